@@ -0,0 +1,118 @@
+"""
+Adaptive Whisper model selection based on the measured real-time factor
+
+The real-time factor (RTF) of a transcribe call is decode time divided by the
+duration of the audio decoded. Staying below 1.0 is required to keep up with a
+live microphone; the controller keeps the smoothed RTF under a target by
+switching between preloaded models of different sizes.
+"""
+import threading
+
+
+class AdaptiveModelController:
+    def __init__(self, model_sizes, load_model, initial_size=None, target_rtf=0.7,
+                 headroom=0.5, patience=3, smoothing=0.5):
+        """
+        Preload the given models and start at `initial_size`
+
+        Args:
+            model_sizes (list): Model sizes ordered from fastest to most accurate, e.g. ["tiny", "base", "small"]
+            load_model (callable): Function loading a model from its size
+            initial_size (str): Size to start with (defaults to the largest)
+            target_rtf (float): Step down when the smoothed RTF exceeds this
+            headroom (float): Step up when the smoothed RTF is below target_rtf * headroom
+            patience (int): Consecutive measurements required before switching
+            smoothing (float): Weight of the newest measurement in the moving average
+        """
+        if not model_sizes:
+            raise ValueError("model_sizes must not be empty")
+
+        self.model_sizes = list(model_sizes)
+        self.target_rtf = target_rtf
+        self.headroom = headroom
+        self.patience = patience
+        self.smoothing = smoothing
+
+        self.models = {size: load_model(size) for size in self.model_sizes}
+        if initial_size not in self.models:
+            initial_size = self.model_sizes[-1]
+        self.index = self.model_sizes.index(initial_size)
+
+        # Last smoothed RTF seen for each size, used to avoid stepping back up
+        # into a model that is already known to be too slow
+        self.size_rtf = {}
+        self.smoothed_rtf = None
+        self.over_count = 0
+        self.under_count = 0
+        self.switches = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_size(self):
+        return self.model_sizes[self.index]
+
+    @property
+    def model(self):
+        return self.models[self.current_size]
+
+    def record(self, audio_seconds, decode_seconds):
+        """
+        Record one transcribe call and switch models if needed
+
+        Returns:
+            bool: True if the active model changed
+        """
+        if audio_seconds <= 0:
+            return False
+
+        rtf = decode_seconds / audio_seconds
+        with self._lock:
+            if self.smoothed_rtf is None:
+                self.smoothed_rtf = rtf
+            else:
+                self.smoothed_rtf = self.smoothing * rtf + (1 - self.smoothing) * self.smoothed_rtf
+            self.size_rtf[self.current_size] = self.smoothed_rtf
+
+            if self.smoothed_rtf > self.target_rtf:
+                self.over_count += 1
+                self.under_count = 0
+            elif self.smoothed_rtf < self.target_rtf * self.headroom:
+                self.under_count += 1
+                self.over_count = 0
+            else:
+                self.over_count = 0
+                self.under_count = 0
+
+            if self.over_count >= self.patience:
+                return self._switch(-1)
+            if self.under_count >= self.patience:
+                larger = self.index + 1
+                if larger < len(self.model_sizes):
+                    known_rtf = self.size_rtf.get(self.model_sizes[larger])
+                    if known_rtf is None or known_rtf <= self.target_rtf:
+                        return self._switch(1)
+                    # Let stale measurements decay so load spikes aren't held against a model forever
+                    self.size_rtf[self.model_sizes[larger]] = known_rtf * 0.9
+                self.under_count = 0
+            return False
+
+    def step_down(self):
+        """Immediately switch to the next smaller model (e.g. on queue overload)"""
+        with self._lock:
+            return self._switch(-1)
+
+    def _switch(self, step):
+        """Move `step` positions along the size ladder (caller holds the lock)"""
+        new_index = self.index + step
+        self.over_count = 0
+        self.under_count = 0
+        if not 0 <= new_index < len(self.model_sizes):
+            return False
+
+        old_size = self.current_size
+        self.index = new_index
+        # Start the new model's average from its last known value, if any
+        self.smoothed_rtf = self.size_rtf.get(self.current_size)
+        self.switches += 1
+        print(f"⚙️  Real-time factor adaptation: {old_size} -> {self.current_size}")
+        return True
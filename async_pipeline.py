@@ -0,0 +1,264 @@
+"""
+Asyncio pipeline core for RageBot
+
+Replaces the polling QThreads and per-request threads with one event loop:
+transcripts are pushed into the loop from the transcriber (no polling), Gemini
+is called with an async HTTP client (other LLM backends run on an executor),
+and the blocking Whisper capture loop and TTS engine run on dedicated
+executors. Shutdown cancels in-flight work and waits for every component to
+stop.
+
+In the GUI the loop is the Qt event loop, bridged with qasync, so callbacks run
+on the UI thread and can update widgets directly.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from gemini_api import GeminiAPI, check_response
+from resilience import LLMError, ServiceUnavailableError, call_with_retries_async
+from speculation import SpeculativePrefetcher
+
+
+class AsyncGeminiAPI(GeminiAPI):
+    def __init__(self, api_key, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.client = httpx.AsyncClient(timeout=self.timeout)
+
+    async def generate_response_async(self, conversation_history):
+        """
+        Generate a response using Gemini API without blocking the event loop
+
+        Raises:
+            LLMError: The request failed after retries, or the circuit is open
+        """
+        payload = self.build_payload(conversation_history)
+        result = await call_with_retries_async(lambda: self._post_async(payload), self.retry_policy,
+                                               self.circuit_breaker, self.rate_limiter)
+        return self.parse_response(result)
+
+    async def _post_async(self, payload):
+        """Send one request and return the decoded JSON body"""
+        url = f"{self.base_url}?key={self.api_key}"
+        try:
+            response = await self.client.post(url, json=payload)
+        except httpx.HTTPError as e:
+            raise ServiceUnavailableError(f"Gemini API request failed: {type(e).__name__}") from e
+        check_response(response)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ServiceUnavailableError("Gemini API returned an invalid response") from e
+
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.aclose()
+
+
+class AsyncPipeline:
+    def __init__(self, transcriber, llm, conversation_history, tts=None,
+                 on_transcription=None, on_suggestion=None, on_responding=None, context_size=5,
+                 turn_aggregator=None, on_turn=None, speculate=False, on_error=None,
+                 on_capture_error=None):
+        """
+        Wire a transcriber, an async LLM client and optional TTS together
+
+        Args:
+            transcriber (LiveTranscription): Source of transcripts
+            llm (LLMBackend): Backend with a generate_response_async coroutine, e.g. AsyncGeminiAPI
+            conversation_history (list): Shared history list; "User:" / "AI:" entries are appended
+            tts: Object with a blocking speak(text) method, or None to skip speech
+            on_transcription (callable): Called with each new transcript
+            on_suggestion (callable): Called with each suggestion
+            on_responding (callable): Called with True/False as the AI starts/stops responding
+            context_size (int): Number of history entries sent to the LLM
+            turn_aggregator (TurnAggregator): Merges transcripts into turns and only
+                requests a suggestion once a turn has ended (None: every transcript is a turn)
+            on_turn (callable): Called with each completed turn
+            speculate (bool): With a turn_aggregator, start requests on the turn in
+                progress and reuse them if the final turn matches closely
+            on_error (callable): Called with the message of a failed suggestion request
+                (failures are not added to the conversation history)
+            on_capture_error (callable): Called with the message of the error that ended
+                transcription (e.g. the microphone could not be opened); the pipeline stops
+        """
+        self.transcriber = transcriber
+        self.llm = llm
+        self.conversation_history = conversation_history
+        self.tts = tts
+        self.on_transcription = on_transcription
+        self.on_suggestion = on_suggestion
+        self.on_responding = on_responding
+        self.on_error = on_error
+        self.on_capture_error = on_capture_error
+        self.context_size = context_size
+        self.turn_aggregator = turn_aggregator
+        self.on_turn = on_turn
+        self.speculator = SpeculativePrefetcher(self._start_speculative_request) if speculate else None
+
+        # The capture loop blocks for the whole session; TTS engines are not thread-safe
+        self._capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+        self._tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+        self._transcripts = None
+        self._capture_future = None
+        self._suggestion_task = None
+        self._turn_timer = None
+        self._speaking = False
+        self._stopped = None
+        self._deliver = None
+
+    async def run(self):
+        """Run until stop() is called or the task is cancelled"""
+        loop = asyncio.get_running_loop()
+        self._transcripts = asyncio.Queue()
+        self._stopped = asyncio.Event()
+
+        # Called on the transcription thread; hand the text over to the loop
+        self._deliver = lambda text: loop.call_soon_threadsafe(self._transcripts.put_nowait, text)
+        self.transcriber.on_transcription = self._deliver
+        self._capture_future = loop.run_in_executor(self._capture_executor, self.transcriber.start_transcription)
+
+        try:
+            while not self._stopped.is_set():
+                next_transcript = asyncio.ensure_future(self._transcripts.get())
+                stopped = asyncio.ensure_future(self._stopped.wait())
+                done, _ = await asyncio.wait(
+                    {next_transcript, stopped, self._capture_future},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                stopped.cancel()
+                if next_transcript not in done:
+                    next_transcript.cancel()
+                    if self._capture_future in done:
+                        self._report_capture_error()
+                    break
+                self._handle_transcript(next_transcript.result())
+        finally:
+            await self._shutdown()
+
+    def _report_capture_error(self):
+        """Pass on the error that ended the capture loop, if it ended with one"""
+        if self._capture_future.cancelled() or self._capture_future.exception() is None:
+            return
+        error = self._capture_future.exception()
+        print(f"Transcription stopped: {error}")
+        if self.on_capture_error:
+            self.on_capture_error(str(error))
+
+    def _handle_transcript(self, text):
+        """Add a transcript to the current turn, or treat it as a turn of its own"""
+        if not self.turn_aggregator:
+            self._handle_turn(text)
+            if self.on_transcription:
+                self.on_transcription(text)
+            return
+
+        delay = self.turn_aggregator.add(text)
+        if self.on_transcription:
+            self.on_transcription(text)
+        if delay is not None:
+            self._schedule_turn_check(delay)
+            if self.speculator:
+                partial = self.turn_aggregator.pending_text
+                context = self.conversation_history[-(self.context_size - 1):] + [f"User: {partial}"]
+                self.speculator.on_partial("\n".join(context), partial)
+
+    def _start_speculative_request(self, context):
+        """Start a suggestion request for a turn that is still in progress"""
+        return asyncio.ensure_future(self.llm.generate_response_async(context))
+
+    def _schedule_turn_check(self, delay):
+        """(Re)arm the end-of-turn timer"""
+        if self._turn_timer:
+            self._turn_timer.cancel()
+        self._turn_timer = asyncio.get_running_loop().call_later(delay, self._check_turn)
+
+    def _check_turn(self):
+        """End the current turn if nothing new arrived before its deadline"""
+        self._turn_timer = None
+        turn = self.turn_aggregator.flush_due()
+        if turn is not None:
+            self._handle_turn(turn)
+            return
+        remaining = self.turn_aggregator.time_until_due()
+        if remaining is not None:
+            self._schedule_turn_check(remaining)
+
+    def _handle_turn(self, text):
+        """Record a finished turn and (re)start suggestion generation"""
+        self.conversation_history.append(f"User: {text}")
+        if self.on_turn:
+            self.on_turn(text)
+
+        # A newer transcript supersedes a suggestion that is still being generated
+        if self._suggestion_task and not self._suggestion_task.done() and not self._speaking:
+            self._suggestion_task.cancel()
+        prefetched = self.speculator.on_turn(text) if self.speculator else None
+        self._suggestion_task = asyncio.ensure_future(self._suggest(prefetched))
+
+    async def _suggest(self, prefetched=None):
+        """Generate one suggestion (or wait for a prefetched one) and speak it"""
+        self._set_responding(True)
+        try:
+            try:
+                if prefetched is not None:
+                    suggestion = await prefetched
+                else:
+                    context = "\n".join(self.conversation_history[-self.context_size:])
+                    suggestion = await self.llm.generate_response_async(context)
+            except LLMError as e:
+                print(f"Error generating suggestion: {e}")
+                if self.on_error:
+                    self.on_error(str(e))
+                return
+
+            self.conversation_history.append(f"AI: {suggestion}")
+            if self.on_suggestion:
+                self.on_suggestion(suggestion)
+
+            if self.tts and suggestion:
+                self._speaking = True
+                try:
+                    await asyncio.get_running_loop().run_in_executor(self._tts_executor, self.tts.speak, suggestion)
+                finally:
+                    self._speaking = False
+        finally:
+            # A superseded task must not clear the flag for the one that replaced it
+            if self._suggestion_task is asyncio.current_task():
+                self._set_responding(False)
+
+    def _set_responding(self, responding):
+        if self.on_responding:
+            self.on_responding(responding)
+
+    def stop(self):
+        """Ask run() to finish; safe to call more than once"""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def _shutdown(self):
+        """Cancel in-flight work and wait for every component to stop"""
+        if self._turn_timer:
+            self._turn_timer.cancel()
+            self._turn_timer = None
+        if self.speculator:
+            self.speculator.cancel()
+            stats = self.speculator.get_stats()
+            print(f"🔮 Speculation: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['wasted_calls']} wasted calls")
+        if self._suggestion_task and not self._suggestion_task.done():
+            self._suggestion_task.cancel()
+            await asyncio.gather(self._suggestion_task, return_exceptions=True)
+
+        # The app reuses one transcriber: if Start was pressed again while this shutdown
+        # awaited the suggestion task, it now belongs to the next pipeline
+        if self.transcriber.on_transcription is self._deliver:
+            self.transcriber.stop_transcription()
+            self.transcriber.on_transcription = None
+        if self._capture_future:
+            await asyncio.gather(self._capture_future, return_exceptions=True)
+
+        await self.llm.aclose()
+        self._capture_executor.shutdown(wait=False)
+        self._tts_executor.shutdown(wait=False)
@@ -0,0 +1,70 @@
+"""
+Input device enumeration for RageBot
+
+Lists the microphones PortAudio can see, with their native sample rates, so the
+transcriber can capture at the rate the device actually runs at and resample
+itself instead of relying on driver-side conversion.
+
+Usage:
+    python audio_devices.py
+"""
+import pyaudio
+
+
+def list_input_devices(pyaudio_instance=None):
+    """
+    List devices with at least one input channel
+
+    Args:
+        pyaudio_instance (pyaudio.PyAudio): Instance to query; a temporary one is
+            created (and terminated) if not given
+
+    Returns:
+        list: Dicts with "index", "name", "sample_rate", "channels" and "host_api"
+    """
+    owns_instance = pyaudio_instance is None
+    if owns_instance:
+        pyaudio_instance = pyaudio.PyAudio()
+    try:
+        devices = []
+        for index in range(pyaudio_instance.get_device_count()):
+            info = pyaudio_instance.get_device_info_by_index(index)
+            if info.get("maxInputChannels", 0) < 1:
+                continue
+            devices.append({
+                "index": index,
+                "name": info.get("name", f"Device {index}"),
+                "sample_rate": int(info.get("defaultSampleRate", 16000)),
+                "channels": int(info["maxInputChannels"]),
+                "host_api": pyaudio_instance.get_host_api_info_by_index(info["hostApi"]).get("name", ""),
+            })
+        return devices
+    finally:
+        if owns_instance:
+            pyaudio_instance.terminate()
+
+
+def get_input_device_info(pyaudio_instance, device_index=None):
+    """PortAudio info for an input device (the default input device if index is None)"""
+    if device_index is None:
+        return pyaudio_instance.get_default_input_device_info()
+    info = pyaudio_instance.get_device_info_by_index(device_index)
+    if info.get("maxInputChannels", 0) < 1:
+        raise ValueError(f"Audio device {device_index} ({info.get('name')}) has no input channels")
+    return info
+
+
+def main():
+    """Print the available input devices"""
+    devices = list_input_devices()
+    if not devices:
+        print("❌ No input devices found")
+        return
+    print("🎙️  Input devices:")
+    for device in devices:
+        print(f"  [{device['index']}] {device['name']} ({device['host_api']}) - "
+              f"{device['sample_rate']} Hz, {device['channels']} ch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Audio clean-up before transcription
+
+Microphone audio used to go to Whisper as captured. A DC offset, a quiet
+microphone or steady background noise (fans, hum, hiss) all push Whisper
+towards hallucinated segments and temperature fallbacks, which cost decode
+time. AudioFrontEnd runs three NumPy stages on every captured buffer, in this
+order:
+
+    DC removal   one-pole high-pass filter (20 Hz by default)
+    noise gate   STFT with 50% overlapping sqrt-Hann windows; the noise spectrum
+                 is tracked per bin from its minima, and bins close to it are
+                 attenuated (spectral subtraction with a floor and slow release)
+    AGC          gain towards a target RMS level, measured on frames loud enough
+                 to be speech and applied as a ramp so it never steps; silence
+                 keeps the last gain instead of being amplified
+
+Filter state, noise estimate and gain carry over between buffers, so the
+stream is processed without seams. The noise gate delays the audio by
+`frame_size` samples (32 ms at 16 kHz), since a frame can only be output once
+the next one overlaps it.
+"""
+import numpy as np
+
+# Samples per vectorized block of the DC filter; keeps a**-n well within float64 range
+DC_BLOCK_SIZE = 2048
+
+
+class AudioFrontEnd:
+    def __init__(self, sample_rate=16000, dc_removal=True, noise_gate=True, agc=True,
+                 dc_cutoff=20.0, frame_size=512, gate_floor_db=-20.0, over_subtraction=2.0,
+                 noise_rise_db=3.0, gate_release=0.1, target_level_db=-20.0, max_gain_db=20.0,
+                 speech_level_db=-45.0, agc_attack=0.05, agc_release=1.0):
+        """
+        Args:
+            sample_rate (int): Rate of the audio passed to process()
+            dc_removal (bool): Remove the DC offset
+            noise_gate (bool): Attenuate stationary background noise
+            agc (bool): Normalize the speech level
+            dc_cutoff (float): Corner frequency of the DC filter in Hz
+            frame_size (int): STFT frame of the noise gate, in samples (even)
+            gate_floor_db (float): Strongest attenuation applied to a noise bin
+            over_subtraction (float): Multiple of the noise estimate subtracted; makes
+                up for the minimum tracker's low bias
+            noise_rise_db (float): How fast the noise estimate may rise, in dB per second
+            gate_release (float): Seconds for a bin's gain to fall back to the floor
+                after speech
+            target_level_db (float): RMS level (dBFS) the AGC brings speech to
+            max_gain_db (float): Largest boost (cuts are not limited)
+            speech_level_db (float): Frames quieter than this (dBFS, before gain) don't
+                change the gain
+            agc_attack (float): Time constant in seconds when the level rises
+            agc_release (float): Time constant in seconds when the level falls
+        """
+        if frame_size % 2:
+            raise ValueError(f"frame_size must be even, got {frame_size}")
+        self.sample_rate = sample_rate
+        self.dc_removal = dc_removal
+        self.noise_gate = noise_gate
+        self.agc = agc
+
+        self.dc_pole = np.exp(-2 * np.pi * dc_cutoff / sample_rate)
+
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.window = np.sqrt(np.hanning(frame_size + 1)[:-1])  # Periodic; squares sum to 1 at 50% overlap
+        self.gate_floor = 10 ** (gate_floor_db / 20)
+        self.over_subtraction = over_subtraction
+        hop_seconds = self.hop / sample_rate
+        self.noise_rise = 10 ** (noise_rise_db * hop_seconds / 20)
+        self.gate_decay = self.gate_floor ** (hop_seconds / gate_release)
+
+        self.target_level = 10 ** (target_level_db / 20)
+        self.max_gain = 10 ** (max_gain_db / 20)
+        self.speech_level = 10 ** (speech_level_db / 20)
+        self.agc_attack = agc_attack
+        self.agc_release = agc_release
+
+        self.reset()
+
+    def reset(self):
+        """Forget all filter state, e.g. for an unrelated stream"""
+        self._dc_input = 0.0  # Last input and output sample of the DC filter
+        self._dc_output = 0.0
+
+        self._gate_history = np.zeros(self.hop)  # Second half of the last analysis frame
+        self._gate_pending = np.zeros(0)  # Input not yet making up a full hop
+        self._gate_overlap = np.zeros(self.hop)  # Second half of the last synthesized frame
+        # Output not yet returned, primed with one hop of silence so every call can return
+        # as many samples as it was given
+        self._gate_output = np.zeros(self.hop)
+        self._spectrum = None  # Smoothed magnitude per bin
+        self._noise = None  # Noise magnitude per bin
+        self._gains = None  # Gate gain per bin
+
+        self._level = None  # Speech level the AGC follows
+        self.gain = 1.0
+
+    def process(self, samples):
+        """
+        Clean a block of audio in place
+
+        Args:
+            samples (np.ndarray): float32 samples in [-1, 1], contiguous with the
+                previous call's
+
+        Returns:
+            np.ndarray: `samples`
+        """
+        if not len(samples):
+            return samples
+        x = samples.astype(np.float64)
+        if self.dc_removal:
+            x = self._remove_dc(x)
+        if self.noise_gate:
+            x = self._gate_noise(x)
+        if self.agc:
+            x = self._apply_agc(x)
+        np.clip(x, -1.0, 1.0, out=x)
+        samples[:] = x
+        return samples
+
+    def process_pcm(self, buffer, start=0):
+        """
+        Clean 16-bit PCM in place
+
+        Args:
+            buffer (bytearray): Writable int16 buffer, e.g. the transcriber's chunk buffer
+            start (int): Byte offset of the first sample to process; earlier samples
+                were processed already
+        """
+        pcm = np.frombuffer(buffer, dtype=np.int16, offset=start)
+        samples = pcm.astype(np.float32) / 32768.0
+        self.process(samples)
+        pcm[:] = np.clip(np.round(samples * 32768.0), -32768, 32767)
+
+    def get_stats(self):
+        """Current AGC gain and mean noise floor, in dB"""
+        noise = None
+        if self._noise is not None:
+            # Parseval: mean |X|^2 over the bins is the windowed frame's energy per window energy
+            noise_rms = np.sqrt(np.mean(self._noise ** 2) / np.sum(self.window ** 2))
+            noise = 20 * np.log10(max(noise_rms, 1e-10))
+        return {"gain_db": 20 * np.log10(self.gain), "noise_floor_db": noise}
+
+    def _remove_dc(self, x):
+        """y[n] = x[n] - x[n-1] + a * y[n-1], evaluated in closed form per block"""
+        a = self.dc_pole
+        y = np.empty_like(x)
+        for offset in range(0, len(x), DC_BLOCK_SIZE):
+            block = x[offset:offset + DC_BLOCK_SIZE]
+            diff = np.diff(block, prepend=self._dc_input)
+            powers = a ** np.arange(1, len(block) + 1)
+            # y[n] = a^(n+1) y[-1] + sum_k a^(n-k) diff[k]
+            y[offset:offset + len(block)] = powers * (self._dc_output + np.cumsum(diff / powers))
+            self._dc_input = block[-1]
+            self._dc_output = y[offset + len(block) - 1]
+        return y
+
+    def _gate_noise(self, x):
+        """Spectral noise gate; returns len(x) samples, delayed by frame_size"""
+        hop = self.hop
+        pending = np.concatenate([self._gate_pending, x])
+        hops = len(pending) // hop
+        if hops:
+            new = pending[:hops * hop]
+            self._gate_pending = pending[hops * hop:]
+            # Frame i covers the previous hop and new hop i
+            signal = np.concatenate([self._gate_history, new])
+            frames = np.lib.stride_tricks.sliding_window_view(signal, self.frame_size)[::hop]
+            self._gate_history = new[-hop:]
+
+            spectra = np.fft.rfft(frames * self.window, axis=-1)
+            spectra *= self._gate_gains(np.abs(spectra))
+            frames = np.fft.irfft(spectra, n=self.frame_size, axis=-1) * self.window
+
+            # Overlap-add: hop i of the output is frame i's first half plus frame i-1's second half
+            previous = np.concatenate([self._gate_overlap[None], frames[:-1, hop:]])
+            output = (frames[:, :hop] + previous).reshape(-1)
+            self._gate_overlap = frames[-1, hop:]
+            self._gate_output = np.concatenate([self._gate_output, output])
+        else:
+            self._gate_pending = pending
+
+        y = self._gate_output[:len(x)]
+        self._gate_output = self._gate_output[len(x):]
+        return y
+
+    def _gate_gains(self, magnitudes):
+        """Per-bin gains for consecutive frames, updating the noise estimate"""
+        if self._noise is None:
+            self._spectrum = magnitudes[0].copy()
+            self._noise = magnitudes[0].copy()
+            self._gains = np.ones(magnitudes.shape[1])
+        gains = np.empty_like(magnitudes)
+        for i, magnitude in enumerate(magnitudes):
+            if magnitude.any():  # Masked (all-zero) audio says nothing about the noise
+                self._spectrum = 0.7 * self._spectrum + 0.3 * magnitude
+                self._noise = np.minimum(self._noise * self.noise_rise, self._spectrum)
+            target = 1.0 - self.over_subtraction * self._noise / np.maximum(magnitude, 1e-10)
+            # Open immediately, close slowly, so word endings and gaps don't flutter
+            self._gains = np.maximum(np.clip(target, self.gate_floor, 1.0), self._gains * self.gate_decay)
+            gains[i] = self._gains
+        return gains
+
+    def _apply_agc(self, x):
+        """Ramp the gain towards target_level_db over this block"""
+        rms = np.sqrt(np.mean(x ** 2))
+        gain = self.gain
+        if rms >= self.speech_level:
+            seconds = len(x) / self.sample_rate
+            if self._level is None:
+                self._level = rms
+            else:
+                tau = self.agc_attack if rms > self._level else self.agc_release
+                self._level += (rms - self._level) * (1 - np.exp(-seconds / tau))
+            gain = min(self.max_gain, self.target_level / self._level)
+        ramp = np.linspace(self.gain, gain, len(x) + 1)[1:]
+        self.gain = gain
+        return x * ramp
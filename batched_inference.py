@@ -0,0 +1,134 @@
+"""
+Batched Whisper inference across independent audio segments
+
+WhisperModel.transcribe decodes one audio array at a time. When several
+segments are ready at once (a backlog in one session, or one chunk from each of
+several sessions) it is much cheaper on CPU to run them through a single
+batched encoder/decoder call. This module builds the batch directly on the
+CTranslate2 model that faster-whisper wraps.
+"""
+import queue
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_suppressed_tokens
+
+# One decoded segment; field names match faster_whisper.transcribe.Segment
+BatchedSegment = namedtuple(
+    "BatchedSegment",
+    ["start", "end", "text", "tokens", "avg_logprob", "no_speech_prob", "compression_ratio"],
+)
+
+
+def gather_batch(source_queue, max_batch_size=8, max_wait=0.05, timeout=1.0):
+    """
+    Collect up to max_batch_size items from a queue
+
+    Blocks up to `timeout` for the first item, then keeps collecting until the
+    batch is full or `max_wait` seconds have passed since the first item
+    arrived. Returns an empty list if nothing arrived within `timeout`.
+    """
+    try:
+        batch = [source_queue.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+
+    deadline = time.monotonic() + max_wait
+    while len(batch) < max_batch_size:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining > 0:
+                batch.append(source_queue.get(timeout=remaining))
+            else:
+                batch.append(source_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def transcribe_batch(model, audio_arrays, language="en", beam_size=5, temperature=0.0,
+                     sample_rate=16000, **transcribe_options):
+    """
+    Transcribe several float32 audio arrays (each at most 30 s) in one batch
+
+    Args:
+        model (WhisperModel): Loaded faster-whisper model
+        audio_arrays (list): 16 kHz float32 mono arrays
+        language (str): Language code, or None to detect it per segment
+        beam_size (int): Beam size for decoding
+        temperature (float): Sampling temperature (no fallback is attempted)
+        sample_rate (int): Sample rate of the audio arrays
+        transcribe_options: Other WhisperModel.transcribe options (e.g. best_of);
+            accepted so callers can pass the same options dict, but unused
+
+    Returns:
+        list: One BatchedSegment per input array, in input order
+    """
+    if not audio_arrays:
+        return []
+
+    extractor = model.feature_extractor
+    features = np.stack([
+        pad_or_trim(extractor(audio), extractor.nb_max_frames)
+        for audio in audio_arrays
+    ])
+
+    multilingual = model.model.is_multilingual
+    tokenizer = Tokenizer(
+        model.hf_tokenizer,
+        multilingual,
+        task="transcribe",
+        language=(language or "en") if multilingual else None,
+    )
+    prompt = model.get_prompt(tokenizer, previous_tokens=[], without_timestamps=True)
+
+    encoder_output = model.encode(features)
+    prompts = [list(prompt) for _ in audio_arrays]
+
+    if multilingual and language is None:
+        # Swap the language token per segment, as faster-whisper's batched pipeline does
+        language_index = prompt.index(tokenizer.language)
+        detected = model.model.detect_language(encoder_output)
+        for segment_prompt, segment_languages in zip(prompts, detected):
+            segment_prompt[language_index] = tokenizer.tokenizer.token_to_id(segment_languages[0][0])
+
+    results = model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=beam_size,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+        return_scores=True,
+        return_no_speech_prob=True,
+        sampling_temperature=temperature,
+    )
+
+    segments = []
+    for audio, result in zip(audio_arrays, results):
+        tokens = result.sequences_ids[0]
+        text = tokenizer.decode(tokens)
+        # Scores are length-normalised log probs; undo that like faster-whisper does
+        cumulative_logprob = result.scores[0] * len(tokens)
+        segments.append(BatchedSegment(
+            start=0.0,
+            end=len(audio) / sample_rate,
+            text=text,
+            tokens=tokens,
+            avg_logprob=cumulative_logprob / (len(tokens) + 1),
+            no_speech_prob=result.no_speech_prob,
+            compression_ratio=_compression_ratio(text),
+        ))
+    return segments
+
+
+def _compression_ratio(text):
+    """gzip compression ratio of the text; high values indicate repetition loops"""
+    text_bytes = text.encode("utf-8")
+    if not text_bytes:
+        return 0.0
+    return len(text_bytes) / len(zlib.compress(text_bytes))
@@ -0,0 +1,9 @@
+"""
+Shared helpers for settings read from the environment (.env)
+"""
+import os
+
+
+def env_flag(name):
+    """Return True if the environment variable is set to a truthy value"""
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,118 @@
+"""
+Reference-based echo suppression
+
+While the bot is speaking, the microphone picks up the TTS output. When the
+audio being played is available as a reference signal, EchoSuppressor compares
+each captured buffer with the level of the recent reference: buffers that are
+explained by echo are masked, buffers that are clearly louder than the predicted
+echo (the user talking over the bot) pass through.
+
+The coupling between speaker and microphone is learned on the fly from
+echo-only buffers: it decays slowly towards the measured mic/reference level
+ratio, rises by a bounded step when the echo gets louder, and is left alone
+while the user talks over the bot.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class EchoSuppressor:
+    def __init__(self, sample_rate=16000, max_delay=0.3, margin_db=6.0, frame_duration=0.01,
+                 initial_coupling=1.0):
+        """
+        Args:
+            sample_rate (int): Rate of the captured audio passed to process()
+            max_delay (float): Longest speaker-to-microphone delay to account for, in seconds
+            margin_db (float): How far above the predicted echo level a buffer must be
+                to count as the user talking
+            frame_duration (float): Resolution of the reference level envelope, in seconds
+            initial_coupling (float): Echo level / reference level assumed before it is learned
+        """
+        self.sample_rate = sample_rate
+        self.max_delay = max_delay
+        self.margin = 10 ** (margin_db / 20)
+        self.frame_duration = frame_duration
+        self.coupling = initial_coupling
+
+        # (monotonic time the frame was played, RMS level) for recent reference frames
+        self._reference = deque()
+        self._lock = threading.Lock()
+
+        self.suppressed_buffers = 0
+        self.suppressed_seconds = 0.0
+        self.double_talk_buffers = 0
+
+    def add_reference(self, samples, sample_rate, played_at=None):
+        """
+        Record audio that is being sent to the speakers
+
+        Args:
+            samples (np.ndarray): Mono samples (float in [-1, 1] or int16)
+            sample_rate (int): Rate of the reference samples
+            played_at (float): time.monotonic() at which playback of the block starts
+                (default: now)
+        """
+        samples = np.asarray(samples)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        played_at = time.monotonic() if played_at is None else played_at
+
+        frame = max(1, int(sample_rate * self.frame_duration))
+        count = len(samples) // frame
+        if not count:
+            return
+        levels = np.sqrt(np.mean(samples[:count * frame].reshape(count, frame) ** 2, axis=1))
+        with self._lock:
+            for i, level in enumerate(levels):
+                self._reference.append((played_at + i * self.frame_duration, float(level)))
+
+    def has_reference(self, now=None):
+        """True if reference audio was played within the last max_delay seconds"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return bool(self._reference) and self._reference[-1][0] >= now - self.max_delay
+
+    def process(self, samples, now=None):
+        """
+        Decide whether a captured buffer is echo
+
+        Args:
+            samples (np.ndarray): float32 mono buffer that just finished recording
+            now (float): time.monotonic() at the end of the buffer (default: now)
+
+        Returns:
+            bool: True if the buffer should be masked as echo
+        """
+        now = time.monotonic() if now is None else now
+        duration = len(samples) / self.sample_rate
+        with self._lock:
+            self._expire(now)
+            window_start = now - duration - self.max_delay
+            reference_level = max(
+                (level for played_at, level in self._reference if window_start <= played_at <= now),
+                default=0.0,
+            )
+        if reference_level <= 1e-4:
+            return False
+
+        mic_level = float(np.sqrt(np.mean(np.square(samples)))) if len(samples) else 0.0
+        if mic_level > self.coupling * reference_level * self.margin:
+            # Louder than the echo can explain: the user is talking over the bot
+            self.double_talk_buffers += 1
+            return False
+
+        ratio = mic_level / reference_level
+        self.coupling = max(0.95 * self.coupling, min(ratio, 1.1 * self.coupling))
+        self.suppressed_buffers += 1
+        self.suppressed_seconds += duration
+        return True
+
+    def _expire(self, now):
+        """Drop reference frames too old to show up in the microphone"""
+        horizon = now - self.max_delay - 1.0
+        while self._reference and self._reference[0][0] < horizon:
+            self._reference.popleft()
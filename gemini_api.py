@@ -0,0 +1,107 @@
+"""
+Google Gemini client used to generate RageBot suggestions
+
+Failures raise typed LLMError subclasses (see resilience.py) instead of being
+returned as text. Requests are rate limited to the quota, retried with backoff
+on 429/5xx, and failed fast by a circuit breaker during outages.
+
+GeminiAPI is the default LLMBackend (see llm_backends.py).
+"""
+import requests
+
+from llm_backends import LLMBackend
+from prompts import build_ragebait_prompt
+from resilience import (CircuitBreaker, RateLimiter, RequestRejectedError, RetryPolicy,
+                        ServiceUnavailableError, call_with_retries, check_http_response)
+
+# Free-tier quota for gemini-2.0-flash
+DEFAULT_REQUESTS_PER_MINUTE = 15
+
+
+def check_response(response):
+    """Raise the matching LLMError for an unsuccessful Gemini HTTP response"""
+    check_http_response(response, "Gemini API")
+
+
+class GeminiAPI(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, api_key, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, timeout=30.0,
+                 retry_policy=None, circuit_breaker=None):
+        """
+        Args:
+            api_key (str): Gemini API key
+            requests_per_minute (float): Client-side rate limit matching the key's quota
+            timeout (float): Seconds to wait for one HTTP response
+            retry_policy (RetryPolicy): Backoff settings (default: 4 attempts within 20s)
+            circuit_breaker (CircuitBreaker): Breaker to share between clients
+        """
+        self.api_key = api_key
+        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.requests_per_minute = requests_per_minute
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        
+    def build_payload(self, conversation_history):
+        """Build the request body for a conversation"""
+        prompt = build_ragebait_prompt(conversation_history)
+        
+        return {
+            "contents": [
+                {
+                    "parts": [
+                        {
+                            "text": prompt
+                        }
+                    ]
+                }
+            ]
+        }
+        
+    def parse_response(self, result):
+        """
+        Extract the suggestion text from a response body
+        
+        Raises:
+            RequestRejectedError: Gemini blocked the prompt
+            ServiceUnavailableError: The body has no suggestion, e.g. a safety-filtered
+                candidate without content
+        """
+        try:
+            block_reason = (result.get('promptFeedback') or {}).get('blockReason')
+            if block_reason:
+                raise RequestRejectedError(f"Gemini API blocked the prompt ({block_reason})")
+            text = result['candidates'][0]['content']['parts'][0]['text'].strip()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise ServiceUnavailableError("Gemini API returned no suggestion") from e
+        if not text:
+            raise ServiceUnavailableError("Gemini API returned an empty suggestion")
+        return text
+        
+    def generate_response(self, conversation_history):
+        """
+        Generate a response using Gemini API
+        
+        Raises:
+            LLMError: The request failed after retries, or the circuit is open
+        """
+        payload = self.build_payload(conversation_history)
+        result = call_with_retries(lambda: self._post(payload), self.retry_policy,
+                                   self.circuit_breaker, self.rate_limiter)
+        return self.parse_response(result)
+        
+    def _post(self, payload):
+        """Send one request and return the decoded JSON body"""
+        url = f"{self.base_url}?key={self.api_key}"
+        try:
+            response = requests.post(url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            # Not str(e): requests puts the URL, and with it the API key, in its messages
+            raise ServiceUnavailableError(f"Gemini API request failed: {type(e).__name__}") from e
+        check_response(response)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ServiceUnavailableError("Gemini API returned an invalid response") from e
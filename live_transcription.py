@@ -3,12 +3,72 @@ import wave
 import threading
 import time
 import numpy as np
-from faster_whisper import WhisperModel
 import queue
 import sys
+import gc
+import profiling
+from adaptive_model import AdaptiveModelController
+from transcription_pool import ProcessPoolTranscriber
+from batched_inference import transcribe_batch
+from audio_devices import get_input_device_info
+from resampler import StreamingResampler
+from transcript_filter import TranscriptFilter
+from model_store import load_whisper_model
+from streaming_features import StreamingFeatureExtractor
+from audio_frontend import AudioFrontEnd
+
+# Whisper model sizes from smallest/fastest to largest/slowest
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+
+# Default capture buffer: small enough for level meters and endpointing
+DEFAULT_BUFFER_DURATION = 0.02
+
+# What to do when audio arrives faster than Whisper can transcribe it
+OVERLOAD_POLICIES = ("drop_oldest", "skip_to_live", "degrade")
+
+# What to do with captured audio while our own TTS is playing
+PLAYBACK_GATES = ("drop", "mask", "off")
+
+# Seconds stop() waits for the worker threads; a chunk still being decoded finishes in the background
+STOP_TIMEOUT = 0.5
+
+# Sizes that also come as faster English-only ".en" models
+ENGLISH_ONLY_SIZES = ("tiny", "base", "small", "medium")
+
+
+def whisper_model_name(model_size, english_only=False):
+    """Model to load for a size: its ".en" variant if English-only is wanted and one exists"""
+    if english_only and model_size in ENGLISH_ONLY_SIZES:
+        return f"{model_size}.en"
+    return model_size
+
+
+def _normalize_word(word):
+    """Word compared when deduplicating overlapping chunks: case and punctuation don't count"""
+    return "".join(char for char in word.lower() if char.isalnum())
+
+
+class TranscriptSegment(str):
+    """
+    Text of one decoded Whisper segment, with `start` and `end` in seconds of
+    session audio since start() (dropped audio counts, audio gated by
+    playback_gate="drop" does not)
+    """
+    def __new__(cls, text, start, end):
+        segment = super().__new__(cls, text)
+        segment.start = start
+        segment.end = end
+        return segment
+
 
 class LiveTranscription:
-    def __init__(self, model_size="base", chunk_duration=3.0, sample_rate=16000):
+    def __init__(self, model_size="base", chunk_duration=3.0, sample_rate=16000,
+                 max_lag=10.0, overload_policy="drop_oldest", adaptive_models=None, target_rtf=0.7,
+                 workers=0, max_batch_size=1, max_batch_wait=0.0, pyaudio_instance=None,
+                 frames_per_buffer=None, input_device=None, capture_rate=None,
+                 playback_gate="drop", playback_tail=0.3, echo_suppressor=None,
+                 transcript_filter=True, language="en", english_only=False, language_threshold=0.8,
+                 idle_timeout=None, chunk_overlap=0.0, audio_frontend=False):
         """
         Initialize live transcription with faster-whisper
         
@@ -16,125 +76,830 @@ class LiveTranscription:
             model_size (str): Whisper model size ("tiny", "base", "small", "medium", "large")
             chunk_duration (float): Duration of audio chunks in seconds
             sample_rate (int): Audio sample rate
+            max_lag (float): Maximum seconds of audio allowed to queue up waiting for Whisper
+            overload_policy (str): What to do when the queue is full:
+                "drop_oldest" discards the oldest queued audio,
+                "skip_to_live" discards everything queued and resumes from live audio,
+                "degrade" drops the oldest audio and switches to the next smaller model
+            adaptive_models (list): Model sizes to preload and switch between to keep the
+                real-time factor under target_rtf, e.g. ["tiny", "base", "small"]
+            target_rtf (float): Target real-time factor (decode time / audio duration)
+            workers (int): Number of worker processes to decode chunks in parallel
+                (0 transcribes in a thread of this process)
+            max_batch_size (int): When chunks have piled up, decode up to this many in one
+                batched encoder/decoder call (1 disables batching)
+            max_batch_wait (float): Seconds to wait for another chunk to complete a batch
+            pyaudio_instance (pyaudio.PyAudio): Shared PyAudio instance to capture with; one is
+                created on first start() and reused across start/stop cycles if not given
+            frames_per_buffer (int): Frames per audio callback, independent of chunk_duration
+                (default: 20 ms of audio)
+            input_device (int): PyAudio index of the microphone (None for the default input)
+            capture_rate (int): Rate to open the device at (default: the device's native rate);
+                audio is resampled to sample_rate when they differ
+            playback_gate (str): What to do with audio captured while TTS is playing
+                (see set_playback_active): "drop" discards it, "mask" replaces it with
+                silence, "off" transcribes it
+            playback_tail (float): Seconds to keep gating after playback ends (room echo)
+            echo_suppressor (EchoSuppressor): When given and fed with the played audio via
+                add_playback_reference, masks only the buffers that are echo, so the user
+                can still talk over the bot
+            transcript_filter (TranscriptFilter): Drops hallucinated, low-confidence and
+                duplicate segments before they are emitted (True for the default
+                thresholds, False to emit everything)
+            language (str): Language code, or "auto" to detect the language on the first
+                confident segment of each recording session and use it for the rest of
+                the session (worker processes keep detecting it per chunk)
+            english_only (bool): Load the faster ".en" model variants when the language is
+                English; with "auto" the model is swapped once English is detected
+                (not with adaptive_models or workers, whose models are loaded upfront)
+            language_threshold (float): Detection probability needed to lock the language
+            idle_timeout (float): Seconds after stop() at which the model(s) (or worker
+                processes) and PyAudio are released; the model is loaded again by
+                preload_model() or start() (None keeps everything loaded)
+            chunk_overlap (float): Seconds at the end of each chunk that are decoded again
+                at the start of the next one (a sliding window, so words cut at a chunk
+                boundary get a second chance). Segments that end inside audio already
+                transcribed are not emitted again, and the log-mel frames of the overlap
+                are reused instead of recomputed (see streaming_features.py)
+            audio_frontend (AudioFrontEnd): Cleans captured audio before it is chunked
+                (DC removal, noise gate, AGC; see audio_frontend.py). True for the
+                default settings, False to transcribe audio as captured
         """
+        if overload_policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"overload_policy must be one of {OVERLOAD_POLICIES}, got {overload_policy!r}")
+        if playback_gate not in PLAYBACK_GATES:
+            raise ValueError(f"playback_gate must be one of {PLAYBACK_GATES}, got {playback_gate!r}")
+        if workers and (adaptive_models or overload_policy == "degrade"):
+            raise ValueError("Model switching is not supported with worker processes")
+        if not 0.0 <= chunk_overlap < chunk_duration:
+            raise ValueError(f"chunk_overlap must be in [0, chunk_duration), got {chunk_overlap!r}")
+        
         self.model_size = model_size
         self.chunk_duration = chunk_duration
         self.sample_rate = sample_rate
         self.chunk_size = int(sample_rate * chunk_duration)
+        self.chunk_overlap = chunk_overlap
+        self.chunk_step = self.chunk_size - int(sample_rate * chunk_overlap)  # New samples per chunk
+        self.max_lag = max_lag
+        self.overload_policy = overload_policy
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.workers = workers
+        self.adaptive_models = adaptive_models
+        self.target_rtf = target_rtf
         
-        # Initialize Whisper model
-        print(f"Loading Whisper model: {model_size}")
-        self.model = WhisperModel(model_size)
-        print("Model loaded successfully!")
+        self.auto_language = language == "auto"
+        # None until an "auto" language has been detected in the current session
+        self.language = None if self.auto_language else language
+        self.english_only = english_only
+        self.language_threshold = language_threshold
+        self.transcribe_options = {
+            "language": self.language,
+            "beam_size": 5,
+            "best_of": 5,
+            "temperature": 0.0,
+        }
+        if chunk_overlap and not workers:
+            # Word timings let a segment that starts inside the overlap drop the words already emitted
+            self.transcribe_options["word_timestamps"] = True
+        
+        # Initialize Whisper model(s)
+        self.model = None
+        self.model_controller = None
+        self.transcription_pool = None
+        self._model_lock = threading.Lock()
+        self.idle_timeout = idle_timeout
+        self._idle_timer = None
+        self.model_unloads = 0
+        self._load_models()
         
         # Audio settings
         self.audio_format = pyaudio.paInt16
         self.channels = 1
+        self.frames_per_buffer = frames_per_buffer or int(sample_rate * DEFAULT_BUFFER_DURATION)
+        self.input_device = input_device
+        self.requested_capture_rate = capture_rate
+        self.capture_rate = capture_rate or sample_rate  # Resolved from the device on start()
+        self._resampler = None
         
         # Threading and queues
-        self.audio_queue = queue.Queue()
+        max_queued_buffers = max(1, int(np.ceil(max_lag * sample_rate / self.frames_per_buffer)))
+        self.audio_queue = queue.Queue(maxsize=max_queued_buffers)
         self.transcription_queue = queue.Queue()
-        self.is_recording = False
+        # Optional push-style consumer; when set it receives transcriptions instead of the queue
+        self.on_transcription = None
+        if transcript_filter is True:
+            transcript_filter = TranscriptFilter()
+        self.transcript_filter = transcript_filter or None
+        if audio_frontend is True:
+            audio_frontend = AudioFrontEnd(sample_rate)
+        self.audio_frontend = audio_frontend or None
+        
+        # Lifecycle: set while stopped, so worker threads can block instead of polling
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._lifecycle_lock = threading.Lock()
+        self._threads = []
+        self._stream = None
+        self._closed = False
+        
+        # Backpressure state and counters
+        self.pending_audio_bytes = 0
+        # Seconds of session audio before the chunk buffer; only the transcription thread
+        # writes it, a gap in the queued positions tells it that audio was dropped
+        self.stream_position = 0.0
+        self._capture_position = 0  # Session sample of the next captured buffer (callback thread)
+        self._emitted_until = 0.0  # End of the last emitted segment, for chunk_overlap
+        self._emitted_text = ""  # Text of the last emitted segment, for chunk_overlap
+        self.dropped_buffers = 0
+        self.dropped_seconds = 0.0
+        self.degradations = 0
+        self.last_rtf = None
+        self._degrade_requested = threading.Event()
+        
+        # Self-speech gating
+        self.playback_gate = playback_gate
+        self.playback_tail = playback_tail
+        self.echo_suppressor = echo_suppressor
+        self._playback_active = False
+        self._gate_until = 0.0
+        self.gated_buffers = 0
+        self.gated_seconds = 0.0
         
-        # Initialize PyAudio
-        self.pyaudio_instance = pyaudio.PyAudio()
+        # Capture callback timing, reset on every start()
+        self._reset_callback_stats()
+        
+        # PyAudio is created lazily and kept until close() so restarts don't re-initialise PortAudio
+        self.pyaudio_instance = pyaudio_instance
+        self._owns_pyaudio = pyaudio_instance is None
+        
+    @property
+    def is_recording(self):
+        """True between start() and stop()"""
+        return not self._stopped.is_set()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    @property
+    def model_loaded(self):
+        """True if a model (or the worker pool) is ready to transcribe"""
+        return self.model is not None or self.transcription_pool is not None
+    
+    def _load_models(self):
+        """Load the Whisper model(s), or start the worker processes that hold them"""
+        if self.workers:
+            print(f"Starting {self.workers} transcription workers with model: {self.model_size}")
+            self.transcription_pool = ProcessPoolTranscriber(
+                self._model_name(self.model_size), workers=self.workers,
+                transcribe_options=self.transcribe_options, sample_rate=self.sample_rate
+            )
+        elif self.adaptive_models:
+            self.model_controller = AdaptiveModelController(
+                self.adaptive_models, self._load_model, initial_size=self.model_size,
+                target_rtf=self.target_rtf
+            )
+            self._use_controller_model()
+        else:
+            self.model = self._load_model(self.model_size)
+    
+    def load_model(self):
+        """Load the model(s) again after an idle unload; returns at once if they are loaded"""
+        with self._model_lock:
+            if self.model_loaded or self._closed:
+                return
+            memory_before = profiling.resident_memory_mb()
+            self._load_models()
+            self._report_memory("Whisper model reloaded", memory_before)
+    
+    def preload_model(self):
+        """Start loading the model in the background, e.g. when the user is about to press Start"""
+        if self.model_loaded:
+            return None
+        thread = threading.Thread(target=self.load_model, daemon=True)
+        thread.start()
+        return thread
+    
+    def unload_model(self):
+        """Release the model(s) and worker processes while not recording; returns True if released"""
+        with self._lifecycle_lock, self._model_lock:
+            if self.is_recording or not self.model_loaded:
+                return False
+            memory_before = profiling.resident_memory_mb()
+            self.model = None
+            self.model_controller = None
+            if self.transcription_pool:
+                self.transcription_pool.close()
+                self.transcription_pool = None
+            gc.collect()
+            self.model_unloads += 1
+            self._report_memory("Whisper model unloaded", memory_before)
+            return True
+    
+    def release_audio(self):
+        """Terminate the PyAudio instance this transcriber created; start() creates a new one"""
+        with self._lifecycle_lock:
+            if self.is_recording or self.pyaudio_instance is None or not self._owns_pyaudio:
+                return
+            self.pyaudio_instance.terminate()
+            self.pyaudio_instance = None
+    
+    def _release_idle_resources(self):
+        """Idle timer: leave nothing loaded or initialised while not recording"""
+        self.unload_model()
+        self.release_audio()
+    
+    def _report_memory(self, message, memory_before):
+        """Print a model load/unload with the change in resident memory"""
+        memory_after = profiling.resident_memory_mb()
+        if memory_before is None or memory_after is None:
+            print(f"💾 {message}")
+        else:
+            print(f"💾 {message}: resident memory {memory_before:.0f} MB -> {memory_after:.0f} MB")
+    
+    def _schedule_idle_unload(self):
+        """Arm the idle timer after a recording session"""
+        self._cancel_idle_unload()
+        if self.idle_timeout is not None:
+            self._idle_timer = threading.Timer(self.idle_timeout, self._release_idle_resources)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+    
+    def _cancel_idle_unload(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+    
+    def _loaded_models(self):
+        """In-process models currently loaded"""
+        if self.model_controller:
+            return list(self.model_controller.models.values())
+        return [self.model] if self.model is not None else []
+    
+    def _model_name(self, model_size):
+        """Model to load for a size in the current language"""
+        return whisper_model_name(model_size, self.english_only and self.language == "en")
+    
+    def _load_model(self, model_size):
+        """Load a Whisper model by size"""
+        model_size = self._model_name(model_size)
+        print(f"Loading Whisper model: {model_size}")
+        model = load_whisper_model(model_size)
+        if self.chunk_overlap:
+            # Overlapping chunks share log-mel frames; compute each one once
+            model.feature_extractor = StreamingFeatureExtractor(model.feature_extractor)
+        print("Model loaded successfully!")
+        return model
         
     def audio_callback(self, in_data, frame_count, time_info, status):
         """Callback function for audio stream"""
+        self._record_callback_timing(frame_count, status)
         if self.is_recording:
-            self.audio_queue.put(in_data)
+            if self._resampler:
+                in_data = self._resample(in_data)
+            in_data = self._gate_playback(in_data)
+            if in_data is not None:
+                self._enqueue_audio(in_data)
         return (in_data, pyaudio.paContinue)
     
-    def record_audio(self):
-        """Record audio from microphone"""
+    def set_playback_active(self, active):
+        """Tell the transcriber that TTS playback started (True) or finished (False)"""
+        if not active and self._playback_active:
+            self._gate_until = time.monotonic() + self.playback_tail
+        self._playback_active = active
+    
+    def add_playback_reference(self, samples, sample_rate, played_at=None):
+        """Pass audio sent to the speakers to the echo suppressor, if there is one"""
+        if self.echo_suppressor:
+            self.echo_suppressor.add_reference(samples, sample_rate, played_at)
+    
+    def _gate_playback(self, in_data):
+        """
+        Drop or mask captured audio that is our own TTS output
+        
+        Returns:
+            bytes: Audio to queue, or None to drop the buffer
+        """
+        if self.echo_suppressor and self.echo_suppressor.has_reference():
+            samples = np.frombuffer(in_data, dtype=np.int16).astype(np.float32) / 32768.0
+            if self.echo_suppressor.process(samples):
+                return bytes(len(in_data))
+            return in_data
+        
+        if self.playback_gate == "off":
+            return in_data
+        if not self._playback_active and time.monotonic() >= self._gate_until:
+            return in_data
+        self.gated_buffers += 1
+        self.gated_seconds += len(in_data) / 2 / self.sample_rate
+        return None if self.playback_gate == "drop" else bytes(len(in_data))
+    
+    def _resample(self, in_data):
+        """Convert a capture buffer from the device rate to sample_rate"""
+        samples = np.frombuffer(in_data, dtype=np.int16).astype(np.float32) / 32768.0
+        resampled = self._resampler.process(samples)
+        return np.clip(resampled * 32768.0, -32768, 32767).astype(np.int16).tobytes()
+    
+    def _reset_callback_stats(self):
+        """Clear the capture callback timing counters"""
+        self.callbacks = 0
+        self.input_overflows = 0
+        self.callback_jitter_total = 0.0
+        self.callback_jitter_max = 0.0
+        self._last_callback_time = None
+    
+    def _record_callback_timing(self, frame_count, status):
+        """Measure how far each callback lands from the expected buffer period"""
+        now = time.perf_counter()
+        if self._last_callback_time is not None:
+            jitter = abs(now - self._last_callback_time - frame_count / self.capture_rate)
+            self.callback_jitter_total += jitter
+            self.callback_jitter_max = max(self.callback_jitter_max, jitter)
+        self._last_callback_time = now
+        self.callbacks += 1
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+    
+    def _enqueue_audio(self, in_data):
+        """Queue captured audio with its session position, applying the overload policy when the queue is full"""
+        item = (self._capture_position, in_data)
+        self._capture_position += len(in_data) // 2
+        try:
+            self.audio_queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        
+        if self.overload_policy == "skip_to_live":
+            # Throw away the backlog; the gap makes the worker drop the partial chunk too
+            self._drop_queued_audio(self.audio_queue.qsize())
+        else:
+            self._drop_queued_audio(1)
+            if self.overload_policy == "degrade":
+                self._degrade_requested.set()
+        
+        try:
+            self.audio_queue.put_nowait(item)
+        except queue.Full:
+            self._count_dropped(in_data)
+    
+    def _drop_queued_audio(self, count):
+        """Discard up to `count` of the oldest queued buffers"""
+        for _ in range(count):
+            try:
+                self._count_dropped(self.audio_queue.get_nowait()[1])
+            except queue.Empty:
+                break
+    
+    def _count_dropped(self, audio_data):
+        """Update the dropped-audio counters"""
+        self.dropped_buffers += 1
+        self.dropped_seconds += len(audio_data) / 2 / self.sample_rate
+    
+    def _degrade_model(self):
+        """Switch to the next smaller Whisper model, if there is one"""
+        if self.model_controller:
+            if self.model_controller.step_down():
+                self._use_controller_model()
+                self.degradations += 1
+            return
+        if self.model_size not in MODEL_SIZES or MODEL_SIZES.index(self.model_size) == 0:
+            return
+        smaller = MODEL_SIZES[MODEL_SIZES.index(self.model_size) - 1]
+        print(f"⚠️  Transcription falling behind, degrading model {self.model_size} -> {smaller}")
+        self.model = self._load_model(smaller)
+        self.model_size = smaller
+        self.degradations += 1
+    
+    def _use_controller_model(self):
+        """Pick up the model currently selected by the adaptive controller"""
+        self.model = self.model_controller.model
+        self.model_size = self.model_controller.current_size
+    
+    def _record_decode_time(self, audio_seconds, decode_seconds):
+        """Track the real-time factor and let the adaptive controller react to it"""
+        self.last_rtf = decode_seconds / audio_seconds if audio_seconds else None
+        if self.model_controller and self.model_controller.record(audio_seconds, decode_seconds):
+            self._use_controller_model()
+    
+    def _feature_reuse(self):
+        """Fraction of log-mel frames taken from the overlap cache (None without chunk_overlap)"""
+        extractors = [model.feature_extractor for model in self._loaded_models()
+                      if isinstance(model.feature_extractor, StreamingFeatureExtractor)]
+        reused = sum(extractor.frames_reused for extractor in extractors)
+        total = reused + sum(extractor.frames_computed for extractor in extractors)
+        return reused / total if total else None
+    
+    def get_lag(self):
+        """Seconds of captured audio waiting to be transcribed"""
+        queued_bytes = self.audio_queue.qsize() * self.frames_per_buffer * 2
+        return (queued_bytes + self.pending_audio_bytes) / 2 / self.sample_rate
+    
+    def get_stats(self):
+        """Backpressure counters for monitoring"""
+        return {
+            "lag_seconds": self.get_lag(),
+            "queued_buffers": self.audio_queue.qsize(),
+            "dropped_buffers": self.dropped_buffers,
+            "dropped_seconds": self.dropped_seconds,
+            "degradations": self.degradations,
+            "model_size": self.model_size,
+            "language": self.language,
+            "feature_frames_reused": self._feature_reuse(),
+            "model_loaded": self.model_loaded,
+            "model_unloads": self.model_unloads,
+            "resident_memory_mb": profiling.resident_memory_mb(),
+            "real_time_factor": self.last_rtf,
+            "frontend_gain_db": self.audio_frontend.get_stats()["gain_db"] if self.audio_frontend else None,
+            "filtered_segments": dict(self.transcript_filter.rejected) if self.transcript_filter else {},
+            "gated_buffers": self.gated_buffers,
+            "gated_seconds": self.gated_seconds,
+            "echo_suppressed_seconds": self.echo_suppressor.suppressed_seconds if self.echo_suppressor else 0.0,
+            "capture_rate": self.capture_rate,
+            "callbacks": self.callbacks,
+            "callback_jitter_ms": 1000 * self.callback_jitter_total / max(1, self.callbacks - 1),
+            "callback_jitter_max_ms": 1000 * self.callback_jitter_max,
+            "input_overflows": self.input_overflows,
+        }
+    
+    def _open_stream(self):
+        """Open and start the microphone stream; audio arrives via audio_callback"""
+        if self.pyaudio_instance is None:
+            self.pyaudio_instance = pyaudio.PyAudio()
+        
+        # Capture at the device's own rate and resample here rather than in the driver
+        device_info = get_input_device_info(self.pyaudio_instance, self.input_device)
+        self.capture_rate = self.requested_capture_rate or int(device_info["defaultSampleRate"])
+        if self.capture_rate != self.sample_rate:
+            self._resampler = StreamingResampler(self.capture_rate, self.sample_rate)
+        else:
+            self._resampler = None
+        
+        stream = self.pyaudio_instance.open(
+            format=self.audio_format,
+            channels=self.channels,
+            rate=self.capture_rate,
+            input=True,
+            input_device_index=device_info["index"],
+            frames_per_buffer=max(1, round(self.frames_per_buffer * self.capture_rate / self.sample_rate)),
+            stream_callback=self.audio_callback
+        )
+        print(f"🎙️  Capturing from {device_info['name']} at {self.capture_rate} Hz")
+        stream.start_stream()
+        return stream
+    
+    def _close_stream(self):
+        """Stop and close the microphone stream, if one is open"""
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
         try:
-            stream = self.pyaudio_instance.open(
-                format=self.audio_format,
-                channels=self.channels,
-                rate=self.sample_rate,
-                input=True,
-                frames_per_buffer=self.chunk_size,
-                stream_callback=self.audio_callback
-            )
-            
-            print("🎤 Recording started. Press Ctrl+C to stop.")
-            stream.start_stream()
-            
-            while self.is_recording:
-                time.sleep(0.1)
-                
             stream.stop_stream()
             stream.close()
-            
         except Exception as e:
-            print(f"Error in audio recording: {e}")
+            print(f"Error closing audio stream: {e}")
     
     def process_audio_chunks(self):
         """Process audio chunks and transcribe them"""
-        audio_buffer = b""
+        audio_buffer = bytearray()
+        chunk_bytes = self.chunk_size * 2  # 2 bytes per sample
         
-        while self.is_recording:
+        while True:
             try:
-                # Get audio data from queue
-                audio_data = self.audio_queue.get(timeout=1)
-                audio_buffer += audio_data
+                if self._degrade_requested.is_set():
+                    self._degrade_requested.clear()
+                    self._degrade_model()
                 
-                # Process when we have enough data
-                if len(audio_buffer) >= self.chunk_size * 2:  # 2 bytes per sample
-                    # Convert to numpy array
-                    audio_array = np.frombuffer(audio_buffer, dtype=np.int16)
-                    audio_array = audio_array.astype(np.float32) / 32768.0
-                    
-                    # Transcribe the chunk
-                    segments, _ = self.model.transcribe(
-                        audio_array, 
-                        language="en",  # Change language as needed
-                        beam_size=5,
-                        best_of=5,
-                        temperature=0.0
-                    )
-                    
-                    # Get transcription text
-                    transcription_text = " ".join([segment.text for segment in segments])
+                # Get (position, audio) from queue; None is the shutdown sentinel from stop()
+                item = self.audio_queue.get()
+                if item is None:
+                    break
+                if self._stopped.is_set():
+                    continue
+                self._append_audio(audio_buffer, item)
+                self.pending_audio_bytes = len(audio_buffer)
+                
+                # Capture buffers are much smaller than a chunk; cut one off once enough arrived
+                if len(audio_buffer) >= chunk_bytes:
+                    chunk_start = self.stream_position
+                    chunks = [self._cut_chunk(audio_buffer)]
+                    if self.max_batch_size > 1 and not self.transcription_pool:
+                        self._gather_ready_chunks(chunks, audio_buffer)
+                    self.pending_audio_bytes = len(audio_buffer)
                     
-                    if transcription_text.strip():
-                        print(f"🎯 {transcription_text}")
-                        self.transcription_queue.put(transcription_text)
+                    # Convert to numpy arrays
+                    audio_arrays = [
+                        np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+                        for chunk in chunks
+                    ]
                     
-                    # Clear buffer
-                    audio_buffer = b""
+                    if self.transcription_pool:
+                        # Decoded in a worker process; collect_pool_results emits in order
+                        while self.is_recording and not self.transcription_pool.submit(
+                                audio_arrays[0], timeout=0.5, tag=chunk_start):
+                            pass
+                    elif len(audio_arrays) > 1:
+                        self._transcribe_batch(audio_arrays, chunk_start)
+                    else:
+                        self._transcribe(audio_arrays[0], chunk_start)
                     
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"Error in audio processing: {e}")
     
-    def start_transcription(self):
-        """Start live transcription"""
-        self.is_recording = True
+    def _transcribe(self, audio_array, chunk_start):
+        """
+        Transcribe one float32 chunk with the in-process model
         
-        # Start recording thread
-        record_thread = threading.Thread(target=self.record_audio)
-        record_thread.daemon = True
-        record_thread.start()
+        Segments are decoded lazily while iterating, so each one is emitted as
+        soon as it is decoded instead of after the whole chunk.
+        """
+        decode_seconds = 0.0
+        decode_start = time.perf_counter()
+        if isinstance(self.model.feature_extractor, StreamingFeatureExtractor):
+            self.model.feature_extractor.set_window(audio_array, round(chunk_start * self.sample_rate))
+        segments, info = self.model.transcribe(audio_array, **self.transcribe_options)
+        for segment in segments:
+            decode_seconds += time.perf_counter() - decode_start
+            if self._stopped.is_set():
+                # Stopped mid-chunk; don't decode the remaining segments
+                return
+            if self._emit_segment(segment, chunk_start) and self.language is None:
+                self._lock_language(info.language, info.language_probability)
+            decode_start = time.perf_counter()
+        decode_seconds += time.perf_counter() - decode_start
+        self._record_decode_time(len(audio_array) / self.sample_rate, decode_seconds)
+    
+    def _emit_segment(self, segment, chunk_start):
+        """Emit a Whisper segment unless the transcript filter rejects it; True if emitted"""
+        start, end = chunk_start + segment.start, chunk_start + segment.end
+        text = segment.text.strip()
+        if self.chunk_overlap:
+            if end <= self._emitted_until:
+                # Already transcribed from the previous chunk's copy of the overlap
+                return False
+            if start < self._emitted_until:
+                start, text = self._trim_overlap(segment, chunk_start, start, text)
+                if not text:
+                    return False
+        if self.transcript_filter and not self.transcript_filter.keep(segment):
+            return False
+        self._emit_transcription(TranscriptSegment(text, start, end))
+        self._emitted_until = end
+        self._emitted_text = text
+        return True
+    
+    def _trim_overlap(self, segment, chunk_start, start, text):
+        """Drop the words of a segment that the previous chunk already emitted; returns (start, text)"""
+        words = getattr(segment, "words", None)
+        if words:
+            new_words = [word for word in words if chunk_start + word.end > self._emitted_until]
+            if not new_words:
+                return start, ""
+            return chunk_start + new_words[0].start, "".join(word.word for word in new_words).strip()
+        # No word timings (batched and worker-process segments): drop the longest run of
+        # leading words that repeats the end of the last emitted segment
+        words = text.split()
+        previous = [_normalize_word(word) for word in self._emitted_text.split()]
+        for count in range(min(len(words), len(previous)), 0, -1):
+            if [_normalize_word(word) for word in words[:count]] == previous[-count:]:
+                return start, " ".join(words[count:])
+        return start, text
+    
+    def _lock_language(self, language, probability):
+        """Use a confidently detected language for the rest of the session"""
+        if probability < self.language_threshold:
+            return
+        print(f"🌐 Detected language: {language} ({probability:.0%}), using it for this session")
+        self.language = language
+        self.transcribe_options["language"] = language
+        if self.model_controller or self.transcription_pool:
+            return
+        if self._model_name(self.model_size) != self.model_size:
+            self.model = self._load_model(self.model_size)
+    
+    def _unlock_language(self):
+        """Detect the language again, e.g. in a new session that may be in another language"""
+        english_model = self._model_name(self.model_size) != self.model_size
+        self.language = None
+        self.transcribe_options["language"] = None
+        if english_model and self.model is not None and not (self.model_controller or self.transcription_pool):
+            # The ".en" model can't detect languages
+            self.model = self._load_model(self.model_size)
+    
+    def _gather_ready_chunks(self, chunks, audio_buffer):
+        """
+        Pull already-captured audio off the queue to fill a batch
         
-        # Start processing thread
-        process_thread = threading.Thread(target=self.process_audio_chunks)
-        process_thread.daemon = True
-        process_thread.start()
+        Only audio that is ready now (or within max_batch_wait) is used, so a
+        live, caught-up stream keeps decoding one chunk at a time. Complete
+        chunks are appended to `chunks`; the remainder stays in `audio_buffer`.
+        The batch ends at a gap, so its chunks stay contiguous.
+        """
+        chunk_bytes = self.chunk_size * 2
+        deadline = time.monotonic() + self.max_batch_wait
+        while len(chunks) < self.max_batch_size:
+            try:
+                item = self.audio_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                # Leave the shutdown sentinel for process_audio_chunks
+                self.audio_queue.put_nowait(None)
+                break
+            if not self._append_audio(audio_buffer, item):
+                break
+            while len(audio_buffer) >= chunk_bytes and len(chunks) < self.max_batch_size:
+                chunks.append(self._cut_chunk(audio_buffer))
+    
+    def _append_audio(self, audio_buffer, item):
+        """
+        Add a queued (position, audio) buffer to the chunk buffer, cleaning the new samples in place
+        
+        Returns:
+            bool: False if audio was dropped before this buffer
+        """
+        position, audio_data = item
+        contiguous = position == round(self.stream_position * self.sample_rate) + len(audio_buffer) // 2
+        if not contiguous:
+            # The partial chunk (and the overlap kept for it) can't be continued across the
+            # gap, and cached log-mel frames would be for other audio
+            if audio_buffer:
+                self._count_dropped(audio_buffer)
+            audio_buffer.clear()
+            self.stream_position = position / self.sample_rate
+            self._reset_feature_cache()
+        start = len(audio_buffer)
+        audio_buffer += audio_data
+        if self.audio_frontend:
+            self.audio_frontend.process_pcm(audio_buffer, start)
+        return contiguous
+    
+    def _cut_chunk(self, audio_buffer):
+        """Take one chunk off the front of the buffer, keeping chunk_overlap of it for the next"""
+        chunk = bytes(audio_buffer[:self.chunk_size * 2])
+        del audio_buffer[:self.chunk_step * 2]
+        self.stream_position += self.chunk_step / self.sample_rate
+        return chunk
+    
+    def _reset_feature_cache(self):
+        """Forget cached log-mel frames, which are numbered by stream position"""
+        for model in self._loaded_models():
+            if isinstance(model.feature_extractor, StreamingFeatureExtractor):
+                model.feature_extractor.reset()
+    
+    def _transcribe_batch(self, audio_arrays, chunk_start):
+        """Transcribe several backlogged chunks in one batched call"""
+        decode_start = time.perf_counter()
+        segments = transcribe_batch(self.model, audio_arrays, sample_rate=self.sample_rate,
+                                    **self.transcribe_options)
+        audio_seconds = sum(len(audio_array) for audio_array in audio_arrays) / self.sample_rate
+        self._record_decode_time(audio_seconds, time.perf_counter() - decode_start)
+        for i, segment in enumerate(segments):
+            self._emit_segment(segment, chunk_start + i * self.chunk_step / self.sample_rate)
+    
+    def _emit_transcription(self, transcription_text):
+        """Hand a finished transcription (a TranscriptSegment) to consumers"""
+        if not transcription_text.strip():
+            return
+        if self.transcript_filter and not self.transcript_filter.accept(transcription_text):
+            return
+        print(f"🎯 {transcription_text}")
+        if self.on_transcription:
+            self.on_transcription(transcription_text)
+        else:
+            self.transcription_queue.put(transcription_text)
+    
+    def collect_pool_results(self):
+        """Emit worker-process results in the order the chunks were captured"""
+        while self.is_recording:
+            try:
+                result = self.transcription_pool.next_result(timeout=1)
+                if result is None:
+                    continue
+                # The chunk's start travels with it, so a failed chunk can't shift later ones
+                segments, audio_seconds, decode_seconds, chunk_start = result
+                self.last_rtf = decode_seconds / audio_seconds if audio_seconds else None
+                for segment in segments:
+                    self._emit_segment(segment, chunk_start)
+            except Exception as e:
+                print(f"Error in transcription worker: {e}")
+    
+    def start(self):
+        """Open the microphone and start the worker threads without blocking"""
+        with self._lifecycle_lock:
+            if self._closed:
+                raise RuntimeError("LiveTranscription has been closed")
+            if self.is_recording:
+                return
+            self._cancel_idle_unload()
+            if self.auto_language and self.language is not None:
+                self._unlock_language()
+            self.load_model()
+            
+            # Workers of the previous session may still be finishing a chunk
+            for thread in self._threads:
+                thread.join()
+            
+            # Audio and transcripts left over from a previous session are stale
+            self._drain_audio_queue()
+            while not self.transcription_queue.empty():
+                self.transcription_queue.get_nowait()
+            if self.transcript_filter:
+                self.transcript_filter.reset()
+            if self.audio_frontend:
+                self.audio_frontend.reset()
+            self.pending_audio_bytes = 0
+            self.stream_position = 0.0
+            self._capture_position = 0
+            self._emitted_until = 0.0
+            self._emitted_text = ""
+            self._reset_feature_cache()
+            self._reset_callback_stats()
+            self._stopped.clear()
+            try:
+                self._stream = self._open_stream()
+            except Exception:
+                self._stopped.set()
+                raise
+            print("🎤 Recording started. Press Ctrl+C to stop.")
+            
+            self._threads = [threading.Thread(target=profiling.profiled(self.process_audio_chunks, "transcription"))]
+            if self.transcription_pool:
+                self._threads.append(threading.Thread(
+                    target=profiling.profiled(self.collect_pool_results, "transcription-results")
+                ))
+            for thread in self._threads:
+                thread.daemon = True
+                thread.start()
+    
+    def stop(self, timeout=STOP_TIMEOUT):
+        """
+        Stop capturing and discard audio not transcribed yet; safe to call repeatedly
         
+        Returns within about `timeout` seconds, so it can be called from a UI thread.
+        A worker still decoding a chunk stops after its current segment, and start()
+        waits for it.
+        """
+        with self._lifecycle_lock:
+            if not self.is_recording:
+                return
+            self._stopped.set()
+            
+            # No more callbacks after this; the backlog is stale, so the sentinel goes first
+            self._close_stream()
+            self._drain_audio_queue()
+            self.audio_queue.put_nowait(None)
+            if self.transcription_pool:
+                self.transcription_pool.wake()
+            
+            current = threading.current_thread()
+            deadline = time.monotonic() + timeout
+            for thread in self._threads:
+                if thread is not current:
+                    thread.join(max(0.0, deadline - time.monotonic()))
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            self._schedule_idle_unload()
+            print("✅ Transcription stopped.")
+    
+    def close(self):
+        """Stop and release the worker pool and PyAudio; safe to call repeatedly"""
+        self.stop()
+        with self._lifecycle_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._cancel_idle_unload()
+            if self.transcription_pool:
+                self.transcription_pool.close()
+            if self.pyaudio_instance is not None and self._owns_pyaudio:
+                self.pyaudio_instance.terminate()
+                self.pyaudio_instance = None
+    
+    def _drain_audio_queue(self, count=None):
+        """Discard queued audio without counting it as dropped"""
+        while count is None or count > 0:
+            try:
+                self.audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            if count is not None:
+                count -= 1
+    
+    def start_transcription(self):
+        """Start live transcription and block until stop() is called"""
+        self.start()
         try:
-            while self.is_recording:
-                time.sleep(0.1)
+            self._stopped.wait()
         except KeyboardInterrupt:
             print("\n🛑 Stopping transcription...")
-            self.stop_transcription()
+            self.stop()
     
     def stop_transcription(self):
         """Stop live transcription"""
-        self.is_recording = False
-        self.pyaudio_instance.terminate()
-        print("✅ Transcription stopped.")
+        self.stop()
     
     def get_transcription_history(self):
         """Get all transcriptions from the queue"""
@@ -147,6 +912,7 @@ def main():
     """Main function to run live transcription"""
     print("🎤 Live Transcription with Whisper")
     print("=" * 40)
+    profiling.install()
     
     # Configuration
     model_size = "base"  # Options: "tiny", "base", "small", "medium", "large"
@@ -165,7 +931,7 @@ def main():
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user")
     finally:
-        transcriber.stop_transcription()
+        transcriber.close()
         
         # Show transcription history
         print("\n📝 Transcription History:")
@@ -173,6 +939,13 @@ def main():
         history = transcriber.get_transcription_history()
         for i, text in enumerate(history, 1):
             print(f"{i}. {text}")
+        
+        stats = transcriber.get_stats()
+        print(f"\n📉 Dropped {stats['dropped_seconds']:.1f}s of audio "
+              f"({stats['dropped_buffers']} buffers), final model: {stats['model_size']}")
+        print(f"🔇 Gated {stats['gated_seconds']:.1f}s of audio captured during TTS playback")
+        print(f"⏱️  Capture callbacks: {stats['callbacks']}, jitter mean {stats['callback_jitter_ms']:.1f} ms / "
+              f"max {stats['callback_jitter_max_ms']:.1f} ms, {stats['input_overflows']} input overflows")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Pluggable LLM backends for RageBot suggestions
+
+Every backend turns the recent conversation into one suggestion with
+generate_response(conversation_history) and raises LLMError subclasses (see
+resilience.py) when it can't. The app and the asyncio pipeline only talk to
+this interface, so the backend is picked from configuration:
+
+    LLM_BACKEND=gemini   Google Gemini (gemini_api.GeminiAPI, the default)
+    LLM_BACKEND=local    A local model served by llama.cpp's llama-server (or any
+                         other OpenAI-compatible /v1/chat/completions endpoint)
+    LLM_BACKEND=echo     Deterministic canned replies, for tests and offline demos
+"""
+import asyncio
+import os
+from abc import ABC, abstractmethod
+
+import requests
+
+from prompts import build_ragebait_prompt
+from resilience import (CircuitBreaker, RetryPolicy, ServiceUnavailableError, call_with_retries,
+                        check_http_response)
+
+BACKEND_ENV_VAR = "LLM_BACKEND"
+DEFAULT_LOCAL_URL = "http://127.0.0.1:8080"
+
+
+class LLMBackend(ABC):
+    """Interface implemented by every suggestion backend"""
+    name = None
+
+    @abstractmethod
+    def generate_response(self, conversation_history):
+        """
+        Generate a suggestion for the conversation (blocking)
+
+        Raises:
+            LLMError: No suggestion could be generated
+        """
+
+    async def generate_response_async(self, conversation_history):
+        """Generate a suggestion without blocking the event loop (default: on the loop's executor)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate_response, conversation_history)
+
+    async def aclose(self):
+        """Release connections held by the backend"""
+
+
+class LocalLlamaBackend(LLMBackend):
+    name = "local"
+
+    def __init__(self, base_url=DEFAULT_LOCAL_URL, model="local", max_tokens=80, temperature=0.9,
+                 timeout=60.0, retry_policy=None, circuit_breaker=None):
+        """
+        Args:
+            base_url (str): Address of the llama.cpp server (`llama-server -m model.gguf`)
+            model (str): Model name sent with the request (llama-server ignores it)
+            max_tokens (int): Longest suggestion to generate
+            temperature (float): Sampling temperature
+            timeout (float): Seconds to wait for one response; CPU generation is slow
+            retry_policy (RetryPolicy): Backoff settings (default: one retry)
+            circuit_breaker (CircuitBreaker): Breaker to share between clients
+        """
+        self.url = base_url.rstrip("/") + "/v1/chat/completions"
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+        # No quota to respect locally; retry once for a server that is still loading the model
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=2, max_total_time=self.timeout)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    def build_payload(self, conversation_history):
+        """Build the request body for a conversation"""
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": build_ragebait_prompt(conversation_history)}],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+
+    def parse_response(self, result):
+        """Extract the suggestion text from a response body"""
+        try:
+            text = result["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise ServiceUnavailableError("Local model returned an invalid response") from e
+        return text or "I couldn't generate a response at the moment."
+
+    def generate_response(self, conversation_history):
+        """
+        Generate a response using the local model
+
+        Raises:
+            LLMError: The server is unreachable or failed after retries
+        """
+        payload = self.build_payload(conversation_history)
+        result = call_with_retries(lambda: self._post(payload), self.retry_policy, self.circuit_breaker)
+        return self.parse_response(result)
+
+    def _post(self, payload):
+        """Send one request and return the decoded JSON body"""
+        try:
+            response = requests.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ServiceUnavailableError(f"Local model request failed: {type(e).__name__}") from e
+        check_http_response(response, "Local model")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ServiceUnavailableError("Local model returned an invalid response") from e
+
+
+class EchoBackend(LLMBackend):
+    """Deterministic replies built from the last user line; no network, no model"""
+    name = "echo"
+
+    def __init__(self, template='So you\'re saying "{text}"? Are you getting mad yet?'):
+        self.template = template
+        self.requests = 0
+
+    def generate_response(self, conversation_history):
+        self.requests += 1
+        user_lines = [line[len("User:"):].strip() for line in conversation_history.splitlines()
+                      if line.startswith("User:")]
+        return self.template.format(text=user_lines[-1] if user_lines else "nothing")
+
+
+BACKENDS = ("gemini", "local", "echo")
+
+
+def create_backend(name=None):
+    """
+    Build the backend selected by LLM_BACKEND (or `name`) from environment settings
+
+    Gemini reads GEMINI_API_KEY and GEMINI_RPM; the local backend reads
+    LOCAL_LLM_URL and LOCAL_LLM_MODEL.
+
+    Raises:
+        ValueError: Unknown backend, or the Gemini API key is missing
+    """
+    name = (name or os.getenv(BACKEND_ENV_VAR) or "gemini").strip().lower()
+    if name == "gemini":
+        # Imported here: gemini_api imports this module for LLMBackend
+        from gemini_api import DEFAULT_REQUESTS_PER_MINUTE, GeminiAPI
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is not set")
+        return GeminiAPI(api_key, requests_per_minute=float(os.getenv("GEMINI_RPM", DEFAULT_REQUESTS_PER_MINUTE)))
+    if name == "local":
+        return LocalLlamaBackend(os.getenv("LOCAL_LLM_URL", DEFAULT_LOCAL_URL),
+                                 model=os.getenv("LOCAL_LLM_MODEL", "local"))
+    if name == "echo":
+        return EchoBackend()
+    raise ValueError(f"Unknown {BACKEND_ENV_VAR} {name!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,151 @@
+"""
+Load generator for the multi-stream transcription server
+
+Replays WAV fixtures (16 kHz, mono, 16-bit) over N simulated clients and
+reports throughput and transcript latency.
+
+Usage:
+    python load_generator.py --clients 8 fixtures/*.wav
+    python load_generator.py --clients 32 --no-realtime fixtures/hello.wav
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+import wave
+
+import numpy as np
+
+from transcription_server import send_frame
+
+
+def load_wav(path, sample_rate=16000):
+    """Read a WAV fixture as raw 16-bit PCM bytes"""
+    with wave.open(path, "rb") as wav_file:
+        if (wav_file.getframerate(), wav_file.getnchannels(), wav_file.getsampwidth()) != (sample_rate, 1, 2):
+            raise ValueError(f"{path}: expected {sample_rate} Hz mono 16-bit audio")
+        return wav_file.readframes(wav_file.getnframes())
+
+
+class SimulatedClient:
+    def __init__(self, client_id, pcm, host, port, frame_duration=0.1, realtime=True, sample_rate=16000):
+        """
+        One client streaming a fixture to the server
+
+        Args:
+            client_id (int): Index used in the report
+            pcm (bytes): 16-bit PCM to send
+            host (str): Server host
+            port (int): Server port
+            frame_duration (float): Seconds of audio per frame sent
+            realtime (bool): Pace frames at real time instead of sending as fast as possible
+            sample_rate (int): Audio sample rate
+        """
+        self.client_id = client_id
+        self.pcm = pcm
+        self.host = host
+        self.port = port
+        self.frame_bytes = int(sample_rate * frame_duration) * 2
+        self.realtime = realtime
+        self.sample_rate = sample_rate
+
+        self.transcripts = []
+        self.latencies = []
+        self.error = None
+        self._sent_at = []  # (audio seconds sent so far, wall clock time)
+
+    def run(self):
+        """Stream the fixture and collect transcripts until the server ends the session"""
+        try:
+            with socket.create_connection((self.host, self.port)) as sock:
+                reader = threading.Thread(target=self._read_results, args=(sock.makefile("rb"),))
+                reader.start()
+                self._send_audio(sock)
+                reader.join()
+        except OSError as e:
+            self.error = str(e)
+
+    def _send_audio(self, sock):
+        """Send the PCM in frames, optionally paced at real time"""
+        start = time.perf_counter()
+        for offset in range(0, len(self.pcm), self.frame_bytes):
+            frame = self.pcm[offset:offset + self.frame_bytes]
+            audio_sent = (offset + len(frame)) / 2 / self.sample_rate
+            if self.realtime:
+                delay = start + audio_sent - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            send_frame(sock, frame)
+            self._sent_at.append((audio_sent, time.perf_counter()))
+        send_frame(sock, b"")
+
+    def _read_results(self, rfile):
+        """Read JSON lines and measure latency from when each chunk's audio was sent"""
+        for line in rfile:
+            message = json.loads(line)
+            if message.get("event") == "end":
+                break
+            received = time.perf_counter()
+            self.transcripts.append(message["text"])
+            sent = next((t for audio_sent, t in self._sent_at if audio_sent >= message["end"] - 1e-6), None)
+            if sent is not None:
+                self.latencies.append(received - sent)
+
+
+def run_load(fixtures, clients, host, port, frame_duration=0.1, realtime=True):
+    """Run `clients` simulated clients (fixtures assigned round-robin) and return a report"""
+    pcms = [load_wav(path) for path in fixtures]
+    simulated = [
+        SimulatedClient(i, pcms[i % len(pcms)], host, port, frame_duration, realtime)
+        for i in range(clients)
+    ]
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client.run) for client in simulated]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - start
+
+    audio_seconds = sum(len(client.pcm) / 2 / client.sample_rate for client in simulated)
+    latencies = np.array([latency for client in simulated for latency in client.latencies])
+    return {
+        "clients": clients,
+        "errors": [client.error for client in simulated if client.error],
+        "audio_seconds": audio_seconds,
+        "wall_seconds": wall_seconds,
+        "throughput": audio_seconds / wall_seconds if wall_seconds else 0.0,
+        "transcripts": sum(len(client.transcripts) for client in simulated),
+        "latency_mean": float(latencies.mean()) if latencies.size else None,
+        "latency_p95": float(np.percentile(latencies, 95)) if latencies.size else None,
+    }
+
+
+def main():
+    """Run the load generator from the command line"""
+    parser = argparse.ArgumentParser(description="Replay WAV fixtures against transcription_server.py")
+    parser.add_argument("fixtures", nargs="+", help="16 kHz mono 16-bit WAV files")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--frame-duration", type=float, default=0.1)
+    parser.add_argument("--no-realtime", action="store_true", help="Send audio as fast as possible")
+    args = parser.parse_args()
+
+    print(f"🚀 Replaying {len(args.fixtures)} fixture(s) over {args.clients} clients...")
+    report = run_load(args.fixtures, args.clients, args.host, args.port,
+                      args.frame_duration, realtime=not args.no_realtime)
+
+    print(f"📊 {report['audio_seconds']:.1f}s of audio in {report['wall_seconds']:.1f}s "
+          f"({report['throughput']:.2f}x real time)")
+    print(f"📝 {report['transcripts']} transcripts")
+    if report["latency_mean"] is not None:
+        print(f"⏱️  Latency: mean {report['latency_mean']:.2f}s, p95 {report['latency_p95']:.2f}s")
+    for error in report["errors"]:
+        print(f"❌ {error}")
+
+
+if __name__ == "__main__":
+    main()
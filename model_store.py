@@ -0,0 +1,213 @@
+"""
+Offline store of preconverted Whisper models
+
+faster-whisper resolves a model size such as "base" on the Hugging Face hub
+and downloads it on first use, so startup depends on the network and on the
+state of the hub cache. The model store is a plain directory (models/ next to
+this file, or RAGEBOT_MODEL_DIR) holding the preconverted CTranslate2 models
+plus a manifest of their SHA-256 checksums:
+
+    models/
+        manifest.json
+        base/model.bin, config.json, tokenizer.json, vocabulary.txt
+        tiny.en/...
+
+Fill it once on a machine with network access and copy the directory to
+air-gapped machines:
+
+    python model_store.py download-models base tiny.en
+    python model_store.py verify
+
+load_whisper_model() is the single place RageBot loads Whisper models from.
+Models in the store are loaded from their directory without touching the
+network. Other models fall back to the hub, unless RAGEBOT_OFFLINE=1 restricts
+loading to local files.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from config import env_flag
+
+MODEL_DIR_ENV_VAR = "RAGEBOT_MODEL_DIR"
+OFFLINE_ENV_VAR = "RAGEBOT_OFFLINE"
+DEFAULT_MODEL_DIR = Path(__file__).parent / "models"
+MANIFEST_NAME = "manifest.json"
+
+
+class ModelStoreError(RuntimeError):
+    """A model is missing from the store or does not match its manifest"""
+
+
+def store_dir():
+    """Directory of the model store"""
+    return Path(os.getenv(MODEL_DIR_ENV_VAR) or DEFAULT_MODEL_DIR)
+
+
+def offline_mode():
+    """True if RAGEBOT_OFFLINE forbids downloading models"""
+    return env_flag(OFFLINE_ENV_VAR)
+
+
+def read_manifest(directory=None):
+    """Manifest of the store: {model name: {relative file path: {"sha256", "size"}}}"""
+    path = Path(directory or store_dir()) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(manifest, directory):
+    path = Path(directory) / MANIFEST_NAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _checksum_files(model_dir):
+    """Checksums of every file of a model directory"""
+    return {
+        path.relative_to(model_dir).as_posix(): {"sha256": _sha256(path), "size": path.stat().st_size}
+        for path in sorted(model_dir.rglob("*")) if path.is_file()
+    }
+
+
+def download_model(name, directory=None):
+    """
+    Download a preconverted model from the hub into the store and record its checksums
+
+    Args:
+        name (str): faster-whisper model name ("base", "tiny.en", "large-v3", ...)
+        directory (str): Store directory (default: store_dir())
+
+    Returns:
+        Path: Directory of the model
+    """
+    from faster_whisper.utils import download_model as download_ct2_model
+
+    directory = Path(directory or store_dir())
+    model_dir = directory / name
+    print(f"⬇️  Downloading Whisper model {name} to {model_dir}")
+    download_ct2_model(name, output_dir=str(model_dir))
+    # huggingface_hub leaves its own bookkeeping next to the files
+    manifest = read_manifest(directory)
+    manifest[name] = {
+        file: info for file, info in _checksum_files(model_dir).items()
+        if not file.startswith(".cache/")
+    }
+    _write_manifest(manifest, directory)
+    return model_dir
+
+
+def verify_model(name, directory=None, full=True):
+    """
+    Check a stored model against the manifest
+
+    Args:
+        name (str): Model name
+        directory (str): Store directory (default: store_dir())
+        full (bool): Compare SHA-256 checksums; False only compares file sizes,
+            which is cheap enough to do on every load
+
+    Raises:
+        ModelStoreError: The model is missing, incomplete or corrupted
+    """
+    directory = Path(directory or store_dir())
+    files = read_manifest(directory).get(name)
+    if not files:
+        raise ModelStoreError(f"Whisper model {name!r} is not in the model store ({directory}); "
+                              f"run: python model_store.py download-models {name}")
+    for file, expected in files.items():
+        path = directory / name / file
+        if not path.is_file() or path.stat().st_size != expected["size"]:
+            raise ModelStoreError(f"Whisper model {name!r} is incomplete: {file} is missing or truncated")
+        if full and _sha256(path) != expected["sha256"]:
+            raise ModelStoreError(f"Whisper model {name!r} is corrupted: checksum mismatch for {file}")
+
+
+def is_model_available(name):
+    """True if the model can be loaded without downloading anything"""
+    if name in read_manifest():
+        return True
+    from faster_whisper.utils import download_model as download_ct2_model
+    try:
+        download_ct2_model(name, local_files_only=True)
+        return True
+    except Exception:
+        return False
+
+
+def load_whisper_model(name, **kwargs):
+    """
+    Load a Whisper model, from the store when it is there
+
+    Args:
+        name (str): Model name ("base", "tiny.en", ...)
+        kwargs: Other WhisperModel arguments (cpu_threads, compute_type, ...)
+
+    Raises:
+        ModelStoreError: The stored model is damaged, or RAGEBOT_OFFLINE=1 and the
+            model is not available locally
+    """
+    from faster_whisper import WhisperModel
+
+    if name in read_manifest():
+        verify_model(name, full=False)
+        return WhisperModel(str(store_dir() / name), **kwargs)
+    if offline_mode():
+        try:
+            return WhisperModel(name, local_files_only=True, **kwargs)
+        except Exception as e:
+            raise ModelStoreError(f"Whisper model {name!r} is not available offline; "
+                                  f"run: python model_store.py download-models {name}") from e
+    return WhisperModel(name, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the offline Whisper model store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    download = commands.add_parser("download-models", help="Download preconverted models into the store")
+    download.add_argument("models", nargs="+", help='Model names, e.g. "base" or "tiny.en"')
+    verify = commands.add_parser("verify", help="Check stored models against their checksums")
+    verify.add_argument("models", nargs="*", help="Models to check (default: all)")
+    commands.add_parser("list", help="List stored models")
+    args = parser.parse_args()
+
+    directory = store_dir()
+    if args.command == "download-models":
+        for name in args.models:
+            download_model(name, directory)
+            verify_model(name, directory)
+            print(f"✅ {name}")
+    elif args.command == "verify":
+        failed = False
+        for name in args.models or sorted(read_manifest(directory)):
+            try:
+                verify_model(name, directory)
+                print(f"✅ {name}")
+            except ModelStoreError as e:
+                print(f"❌ {e}")
+                failed = True
+        if failed:
+            sys.exit(1)
+    else:
+        for name, files in sorted(read_manifest(directory).items()):
+            size = sum(info["size"] for info in files.values())
+            print(f"{name:20} {size / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Piper synthesis worker
+
+tts_backends.PiperBackend runs this script as a persistent subprocess, so the
+voice is loaded once rather than for every utterance. It needs the piper-tts
+package. Protocol, little-endian:
+
+    startup   worker writes the voice's sample rate (uint32)
+    request   one JSON line on stdin: {"text": ..., "length_scale": ...}
+    response  frames of 16-bit mono PCM on stdout, each prefixed with its length
+              in bytes (uint32), one or more per sentence; a zero-length frame
+              ends the utterance, ERROR_FRAME ends it when synthesis failed
+
+Errors are reported on stderr.
+"""
+import argparse
+import json
+import struct
+import sys
+
+# Frame length that ends an utterance whose synthesis failed; the audio sent so far is incomplete
+ERROR_FRAME = 0xFFFFFFFF
+
+
+def synthesize(voice, text, length_scale=None, speaker=None):
+    """Yield PCM as Piper synthesizes it, with either piper-tts API"""
+    if hasattr(voice, "synthesize_stream_raw"):
+        # piper-tts < 1.3
+        yield from voice.synthesize_stream_raw(text, speaker_id=speaker, length_scale=length_scale)
+    else:
+        from piper import SynthesisConfig
+        config = SynthesisConfig(speaker_id=speaker, length_scale=length_scale)
+        for chunk in voice.synthesize(text, syn_config=config):
+            yield chunk.audio_int16_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream Piper speech over stdout")
+    parser.add_argument("--model", required=True, help="Path of the .onnx voice")
+    parser.add_argument("--speaker", type=int, default=None, help="Speaker id of multi-speaker voices")
+    args = parser.parse_args()
+
+    from piper import PiperVoice
+    voice = PiperVoice.load(args.model)
+
+    out = sys.stdout.buffer
+    out.write(struct.pack("<I", voice.config.sample_rate))
+    out.flush()
+    for line in sys.stdin:
+        end = 0
+        try:
+            request = json.loads(line)
+            for pcm in synthesize(voice, request["text"], request.get("length_scale"), args.speaker):
+                if pcm:
+                    out.write(struct.pack("<I", len(pcm)) + pcm)
+                    out.flush()
+        except Exception as e:
+            print(f"Piper error: {e}", file=sys.stderr, flush=True)
+            end = ERROR_FRAME
+        out.write(struct.pack("<I", end))
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
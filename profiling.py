@@ -0,0 +1,173 @@
+"""
+Opt-in profiling hooks for RageBot worker threads
+
+Set RAGEBOT_PROFILE=1 (or launch with `python start_ragebot.py --profile`) to run
+the transcription, suggestion and TTS workers under per-thread cProfile
+collectors and to take periodic tracemalloc snapshots. Profiles are written on
+exit as .prof files that load directly in pstats or snakeviz:
+
+    python -m pstats profiles/transcription-1234.prof
+    snakeviz profiles/transcription-1234.prof
+"""
+import atexit
+import cProfile
+import os
+import pstats
+import threading
+import tracemalloc
+from pathlib import Path
+
+from config import env_flag
+
+PROFILE_ENV_VAR = "RAGEBOT_PROFILE"
+PROFILE_DIR_ENV_VAR = "RAGEBOT_PROFILE_DIR"
+SNAPSHOT_INTERVAL_ENV_VAR = "RAGEBOT_PROFILE_SNAPSHOT_INTERVAL"
+
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+
+_lock = threading.Lock()
+_running_profilers = {}  # (name, thread ident) -> cProfile.Profile
+_finished_stats = {}  # name -> pstats.Stats merged across threads with that name
+_installed = False
+_snapshot_stop = threading.Event()
+
+
+def is_enabled():
+    """Return True if profiling was requested through the environment"""
+    return env_flag(PROFILE_ENV_VAR)
+
+
+def get_output_dir():
+    """Return (and create) the directory profiles and snapshots are written to"""
+    output_dir = Path(os.getenv(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def profiled(target, name):
+    """
+    Wrap a thread target so it runs under its own cProfile collector
+
+    Returns the target unchanged when profiling is disabled, so call sites can
+    wrap unconditionally. Threads sharing a name (e.g. one suggestion thread per
+    request) are merged into a single profile for that name.
+    """
+    if not is_enabled():
+        return target
+
+    install()
+
+    def wrapper(*args, **kwargs):
+        profiler = cProfile.Profile()
+        key = (name, threading.get_ident())
+        with _lock:
+            _running_profilers[key] = profiler
+        profiler.enable()
+        try:
+            return target(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with _lock:
+                _running_profilers.pop(key, None)
+                _merge_stats(name, profiler)
+
+    return wrapper
+
+
+def _merge_stats(name, profiler):
+    """Fold a finished profiler into the per-name stats (caller holds _lock)"""
+    if name in _finished_stats:
+        _finished_stats[name].add(profiler)
+    else:
+        _finished_stats[name] = pstats.Stats(profiler)
+
+
+def dump_profiles():
+    """Write one .prof file per worker name, including threads still running"""
+    output_dir = get_output_dir()
+    pid = os.getpid()
+
+    with _lock:
+        # Daemon threads are usually still alive at exit; take what they have so far
+        for (name, _), profiler in list(_running_profilers.items()):
+            try:
+                _merge_stats(name, profiler)
+            except Exception as e:
+                print(f"Profiling: could not collect {name}: {e}")
+        _running_profilers.clear()
+
+        for name, stats in _finished_stats.items():
+            path = output_dir / f"{name}-{pid}.prof"
+            stats.dump_stats(str(path))
+            print(f"📊 Profile written: {path}")
+
+
+def resident_memory_mb():
+    """Resident memory of this process in MB, or None if it can't be read"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def _take_snapshot(output_dir, index):
+    """Dump a tracemalloc snapshot loadable with tracemalloc.Snapshot.load"""
+    snapshot = tracemalloc.take_snapshot()
+    path = output_dir / f"memory-{os.getpid()}-{index:04d}.snapshot"
+    snapshot.dump(str(path))
+    return path
+
+
+def _snapshot_loop(interval):
+    """Take tracemalloc snapshots every `interval` seconds until shutdown"""
+    output_dir = get_output_dir()
+    index = 0
+    while not _snapshot_stop.wait(interval):
+        try:
+            _take_snapshot(output_dir, index)
+            index += 1
+        except Exception as e:
+            print(f"Profiling: memory snapshot failed: {e}")
+
+
+def _shutdown():
+    """atexit hook: stop snapshots, write a final snapshot and all profiles"""
+    _snapshot_stop.set()
+    try:
+        if tracemalloc.is_tracing():
+            path = _take_snapshot(get_output_dir(), 9999)
+            print(f"📊 Memory snapshot written: {path}")
+        dump_profiles()
+    except Exception as e:
+        print(f"Profiling: failed to write results: {e}")
+
+
+def install():
+    """Start tracemalloc snapshots and register the exit hook (idempotent)"""
+    global _installed
+    if not is_enabled():
+        return False
+
+    with _lock:
+        if _installed:
+            return True
+        _installed = True
+
+    interval = float(os.getenv(SNAPSHOT_INTERVAL_ENV_VAR, DEFAULT_SNAPSHOT_INTERVAL))
+    tracemalloc.start()
+    snapshot_thread = threading.Thread(target=_snapshot_loop, args=(interval,), name="profiling-snapshots")
+    snapshot_thread.daemon = True
+    snapshot_thread.start()
+    atexit.register(_shutdown)
+
+    print(f"📊 Profiling enabled, writing to {get_output_dir().absolute()}")
+    return True
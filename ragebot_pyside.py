@@ -1,180 +1,185 @@
 import sys
 import os
+import asyncio
 import json
-import requests
 import threading
-import time
 import math
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QTextEdit, QLabel, QWidget, QProgressBar,
-                             QFrame, QSlider, QCheckBox)
-from PySide6.QtCore import QThread, Signal, QTimer, Qt, QPropertyAnimation, QEasingCurve
+                             QFrame, QSlider, QCheckBox, QComboBox)
+from PySide6.QtCore import QThread, Signal, QTimer, Qt, QPropertyAnimation, QEasingCurve, QEvent
 from PySide6.QtGui import QMovie, QPixmap, QFont, QPalette, QColor, QLinearGradient
 from live_transcription import LiveTranscription
-import pyttsx3
+from audio_devices import list_input_devices
+from turn_taking import TurnAggregator
+from speculation import SpeculativePrefetcher
+from gemini_api import GeminiAPI
+from llm_backends import BACKEND_ENV_VAR, create_backend
+from config import env_flag
+from tts_backends import (DirectSpeechBackend, Pyttsx3Backend, StreamingTTSBackend, TTSError,
+                          create_tts_backend)
+from tts_cache import SpeechAudio, TTSCache, cache_key
+import profiling
+import numpy as np
+import pyaudio
 
-class GeminiAPI:
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-        
-    def generate_response(self, conversation_history):
-        """Generate a response using Gemini API"""
-        url = f"{self.base_url}?key={self.api_key}"
-        
-        # Classic ragebaiting with logical fallacies and mocking prompt
-        prompt = f"""You are a master of psychological manipulation and classic ragebaiting tactics. Your goal is to generate SHORT 1-2 SENTENCE responses that use LOGICAL FALLACIES, CLASSIC RAGEBAITING TECHNIQUES, and MOCKINGLY ASK IF THEY'RE GETTING MAD.
-
-CONVERSATION HISTORY:
-{conversation_history}
-
-GENERATE A RESPONSE USING THESE CLASSIC RAGEBAITING TECHNIQUES:
-
-**PRIMARY TACTICS:**
-1. **LOGICAL FALLACIES:**
-   - Straw man: Misrepresent their position in the most ridiculous way
-   - Ad hominem: Attack their character, intelligence, or credibility
-   - Appeal to authority: Claim "experts" or "studies" back your position
-   - False dilemma: Present only two extreme options
-   - Slippery slope: Claim their position leads to absurd consequences
-   - Bandwagon fallacy: Suggest everyone agrees except them
-   - Appeal to tradition: Claim your view is "how it's always been done"
-
-2. **CLASSIC RAGEBAITING:**
-   - Use inflammatory buzzwords and loaded language
-   - Take their position to absurd extremes
-   - Suggest they're being irrational or emotional
-   - Use "facts don't care about your feelings" type language
-   - Imply they're part of a larger societal problem
-   - Use "wake up" or "open your eyes" language
-   - Suggest they're being naive or ignorant
-
-3. **MOCKING MADNESS:**
-   - Ask "are you getting mad?" in a mocking tone
-   - Use "triggered much?" or "snowflake" language
-   - Act like their anger proves your point
-   - Suggest they're being "emotional" as an insult
-   - Use "calm down" condescendingly
-   - Act like their reaction is exactly what you expected
+# The asyncio pipeline core is optional; it needs qasync and httpx
+try:
+    import qasync
+    from async_pipeline import AsyncPipeline, AsyncGeminiAPI
+except ImportError:
+    qasync = None
 
-**RESPONSE STRUCTURE:**
-- Keep responses to 1-2 SHORT sentences maximum
-- Use at least one logical fallacy
-- Include inflammatory language
-- End with a mocking question about their emotional state
-- Sound confident and authoritative
-- Make it seem like their anger validates your position
+ASYNC_ENV_VAR = "RAGEBOT_ASYNC"
+SPECULATE_ENV_VAR = "SPECULATIVE_SUGGESTIONS"
+IDLE_ENV_VAR = "MODEL_IDLE_MINUTES"
 
-**EXAMPLE RESPONSES:**
-- "Obviously you don't understand basic logic, are you getting mad about it?"
-- "You're literally proving my point by being so emotional, triggered much?"
-- "Anyone with common sense knows you're wrong, why are you so defensive?"
-- "You're being irrational and you know it, calm down snowflake."
-- "This is exactly why people like you are the problem, getting mad won't change facts."
+# Seconds of audio per transcribed chunk; also paces turn taking
+CHUNK_DURATION = 2.0
 
-**AVOID:**
-- Long explanations
-- Taking responsibility
-- Logical reasoning
-- Respectful communication
-- Acknowledging their feelings as valid
+# Minutes without recording after which the Whisper model is released
+DEFAULT_IDLE_MINUTES = 10
 
-Generate a single, short 1-2 sentence response that uses logical fallacies, classic ragebaiting, and mockingly asks if they're getting mad:"""
-        
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ]
-        }
-        
-        try:
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            if 'candidates' in result and len(result['candidates']) > 0:
-                return result['candidates'][0]['content']['parts'][0]['text'].strip()
-            else:
-                return "I couldn't generate a response at the moment."
-                
-        except Exception as e:
-            print(f"Error calling Gemini API: {e}")
-            return f"Error: {str(e)}"
+def async_mode_enabled():
+    """Return True if RAGEBOT_ASYNC=1 and the asyncio dependencies are installed"""
+    requested = env_flag(ASYNC_ENV_VAR)
+    if requested and qasync is None:
+        print("Warning: RAGEBOT_ASYNC is set but qasync/httpx are not installed, using threads")
+    return requested and qasync is not None
 
 class TextToSpeech:
-    def __init__(self):
-        self.engine = pyttsx3.init()
-        self.setup_voice()
-        
-    def setup_voice(self):
-        """Setup TTS voice properties for more human-like speech"""
-        voices = self.engine.getProperty('voices')
-        if voices:
-            # Try to find the most natural-sounding voice
-            best_voice = None
-            
-            # Priority order for voice selection
-            voice_priorities = [
-                'david', 'mark', 'james', 'john', 'mike',  # Common male names
-                'microsoft david', 'microsoft mark', 'microsoft james',
-                'sapi5 david', 'sapi5 mark', 'sapi5 james',
-                'nsspeechsynthesizer', 'espeak', 'festival'
-            ]
-            
-            # First try to find a voice by name
-            for priority_name in voice_priorities:
-                for voice in voices:
-                    if priority_name.lower() in voice.name.lower():
-                        best_voice = voice
-                        break
-                if best_voice:
-                    break
-            
-            # If no priority voice found, look for male voices
-            if not best_voice:
-                for voice in voices:
-                    if any(keyword in voice.name.lower() for keyword in ['male', 'david', 'mark', 'james', 'john']):
-                        best_voice = voice
-                        break
-            
-            # Fallback to first available voice
-            if not best_voice and voices:
-                best_voice = voices[0]
-            
-            if best_voice:
-                self.engine.setProperty('voice', best_voice.id)
-                print(f"Selected voice: {best_voice.name}")
-        
-        # Set speech properties for more human-like sound
-        self.engine.setProperty('rate', 165)  # Slightly slower for more natural pace
-        self.engine.setProperty('volume', 0.85)  # Slightly lower volume for realism
-        
-        # Try to set additional properties if available
-        try:
-            # Set pitch to be more natural (if supported)
-            self.engine.setProperty('pitch', 1.0)  # Normal pitch
-        except:
-            pass
+    def __init__(self, backend=None, cache=None, prebuffer=0.25):
+        """
+        Args:
+            backend (TTSBackend): Speech engine (default: TTS_BACKEND from the environment)
+            cache (TTSCache): Cache of synthesized audio
+            prebuffer (float): Seconds of streamed audio to buffer before playback starts
+        """
+        if backend is None:
+            try:
+                backend = create_tts_backend()
+            except (ValueError, TTSError) as e:
+                print(f"Warning: {e}, using pyttsx3 for speech")
+                backend = Pyttsx3Backend()
+        self.backend = backend
+        # Object with set_playback_active(bool), told when speech starts and stops
+        # so the transcriber does not transcribe the bot's own voice
+        self.playback_listener = None
+        # Synthesized audio, so replays and repeated phrases play without the engine
+        self.cache = cache or TTSCache()
+        self.prebuffer = prebuffer
+        self._pyaudio = None
+        self._lock = threading.Lock()
+        
+    def set_rate(self, rate):
+        """Set the speech rate in words per minute"""
+        self.backend.set_rate(rate)
             
     def speak(self, text):
-        """Speak the given text with more human-like patterns"""
+        """
+        Speak the given text with more human-like patterns
+        
+        The cache key is the original text, so a filler picked by
+        make_text_more_natural stays the same on replays.
+        """
+        with self._lock:
+            try:
+                # Process text to make it sound more natural
+                processed_text = self.make_text_more_natural(text)
+                key = cache_key(text, *self.backend.cache_settings())
+                audio = self.cache.get(key)
+                streaming = isinstance(self.backend, StreamingTTSBackend)
+                if audio is None and not streaming:
+                    audio = self.backend.synthesize(processed_text)
+                    if audio:
+                        self.cache.put(key, audio)
+                
+                listener = self.playback_listener
+                if listener:
+                    listener.set_playback_active(True)
+                try:
+                    if audio:
+                        self.play(audio)
+                    elif streaming:
+                        self.play_stream(self.backend.stream(processed_text), key)
+                    elif isinstance(self.backend, DirectSpeechBackend):
+                        # Engine can't render audio; let it speak directly
+                        self.backend.speak(processed_text)
+                finally:
+                    if listener:
+                        listener.set_playback_active(False)
+            except Exception as e:
+                print(f"TTS Error: {e}")
+    
+    def play(self, audio):
+        """Play cached PCM"""
+        self._play([audio.pcm], audio.sample_rate, audio.channels, audio.sample_width)
+    
+    def play_stream(self, stream, key=None):
+        """Play PCM while it is being synthesized, then cache the whole utterance under `key`"""
+        chunks = []
+        
+        def collect():
+            for chunk in stream.chunks:
+                chunks.append(chunk)
+                yield chunk
+        
+        self._play(collect(), stream.sample_rate, stream.channels, stream.sample_width, self.prebuffer)
+        if key and chunks:
+            self.cache.put(key, SpeechAudio(b"".join(chunks), stream.sample_rate,
+                                            stream.channels, stream.sample_width))
+    
+    def _play(self, chunks, sample_rate, channels, sample_width, prebuffer=0.0):
+        """
+        Play PCM through an output stream, passing it to the transcriber's echo suppressor
+        
+        Args:
+            chunks (iterable): PCM blocks, possibly still being synthesized
+            prebuffer (float): Seconds of audio to collect before the first write, so a
+                slow producer doesn't make playback stutter right away
+        """
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        stream = self._pyaudio.open(format=self._pyaudio.get_format_from_width(sample_width),
+                                    channels=channels, rate=sample_rate, output=True)
         try:
-            # Process text to make it sound more natural
-            processed_text = self.make_text_more_natural(text)
-            
-            # Add slight pauses for more natural speech
-            self.engine.say(processed_text)
-            self.engine.runAndWait()
-        except Exception as e:
-            print(f"TTS Error: {e}")
+            frame_bytes = channels * sample_width
+            block = 1024 * frame_bytes
+            prebuffer_bytes = int(prebuffer * sample_rate) * frame_bytes
+            pending = bytearray()
+            started = False
+            for chunk in chunks:
+                pending += chunk
+                if not started and len(pending) < prebuffer_bytes:
+                    continue
+                started = True
+                whole = len(pending) - len(pending) % block
+                for offset in range(0, whole, block):
+                    self._write(stream, bytes(pending[offset:offset + block]), sample_rate, channels, sample_width)
+                del pending[:whole]
+            whole = len(pending) - len(pending) % frame_bytes
+            if whole:
+                self._write(stream, bytes(pending[:whole]), sample_rate, channels, sample_width)
+        finally:
+            stream.stop_stream()
+            stream.close()
+    
+    def _write(self, stream, data, sample_rate, channels, sample_width):
+        listener = self.playback_listener
+        if sample_width == 2 and hasattr(listener, "add_playback_reference"):
+            samples = np.frombuffer(data, dtype=np.int16).reshape(-1, channels)
+            listener.add_playback_reference(samples.mean(axis=1).astype(np.int16), sample_rate)
+        stream.write(data)
+    
+    def close(self):
+        """Release the audio output and the speech engine"""
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+        self.backend.close()
             
     def make_text_more_natural(self, text):
         """Process text to sound more human-like"""
@@ -224,7 +229,8 @@ class TranscriptionThread(QThread):
             
     def stop(self):
         self.is_running = False
-        self.transcriber.stop_transcription()
+        # Unblocks start_transcription(); the owner closes the transcriber
+        self.transcriber.stop()
 
 class AudioProcessingThread(QThread):
     transcription_ready = Signal(str)
@@ -238,18 +244,19 @@ class AudioProcessingThread(QThread):
         self.is_running = True
         while self.is_running:
             try:
-                # Check for new transcriptions
-                if not self.transcriber.transcription_queue.empty():
-                    transcription = self.transcriber.transcription_queue.get()
-                    if transcription.strip():
-                        self.transcription_ready.emit(transcription)
-                time.sleep(0.1)
+                # Block until a transcription arrives; None is the wake-up from stop()
+                transcription = self.transcriber.transcription_queue.get()
+                if transcription is None:
+                    break
+                if transcription.strip():
+                    self.transcription_ready.emit(transcription)
             except Exception as e:
                 print(f"Error in audio processing thread: {e}")
                 break
                 
     def stop(self):
         self.is_running = False
+        self.transcriber.transcription_queue.put(None)
 
 class ModernCard(QFrame):
     """Modern card widget with shadow and rounded corners"""
@@ -271,6 +278,8 @@ class ModernCard(QFrame):
 class RageBotApp(QMainWindow):
     # Define signals as class attributes
     suggestion_received = Signal(str)
+    suggestion_failed = Signal(str)
+    speech_finished = Signal()
     
     def __init__(self):
         super().__init__()
@@ -281,15 +290,28 @@ class RageBotApp(QMainWindow):
         self.transcriber = None
         self.transcription_thread = None
         self.audio_processing_thread = None
-        self.gemini_api = None
-        self.tts = TextToSpeech()
+        self.pipeline = None
+        self.async_mode = async_mode_enabled()
+        self.llm = None
         self.conversation_history = []
         self.is_recording = False
         self.is_ai_responding = False
         self.tts_enabled = True
+        # Transcripts arrive every couple of seconds; suggestions wait for the end of a turn
+        self.turn_aggregator = TurnAggregator(chunk_duration=CHUNK_DURATION)
         
-        # Load API key
-        self.load_api_key()
+        # Load the suggestion backend (LLM_BACKEND, default Gemini)
+        self.load_llm_backend()
+        # After the .env file is loaded, which may set TTS_BACKEND and RAGEBOT_TTS_CACHE_DIR
+        self.tts = TextToSpeech()
+        
+        # SPECULATIVE_SUGGESTIONS=1 starts requests on the turn in progress to hide latency
+        # (the asyncio pipeline has its own speculator)
+        self.speculator = None
+        self.speculation_executor = None
+        if env_flag(SPECULATE_ENV_VAR) and self.llm and not self.async_mode:
+            self.speculation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+            self.speculator = SpeculativePrefetcher(self.start_speculative_request)
         
         # Setup UI
         self.setup_ui()
@@ -299,24 +321,35 @@ class RageBotApp(QMainWindow):
         self.animation_timer.timeout.connect(self.update_animation)
         self.waveform_frame = 0
         
+        # Fires when the current turn may have ended
+        self.turn_timer = QTimer()
+        self.turn_timer.setSingleShot(True)
+        self.turn_timer.timeout.connect(self.on_turn_timer)
+        
         # Connect signals
         self.suggestion_received.connect(self.on_suggestion_received)
+        self.suggestion_failed.connect(self.on_suggestion_failed)
+        self.speech_finished.connect(self.on_speech_finished)
         
-    def load_api_key(self):
-        """Load Gemini API key from .env file"""
+    def load_llm_backend(self):
+        """Load the LLM backend configured in the .env file"""
         # Load .env file from the same directory as the script
         env_path = Path(__file__).parent / '.env'
         load_dotenv(env_path)
         
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            print("Warning: GEMINI_API_KEY not found in .env file!")
+        try:
+            self.llm = create_backend()
+        except ValueError as e:
+            print(f"Warning: {e}!")
             print("Please create a .env file with your Gemini API key:")
             print("GEMINI_API_KEY=your_api_key_here")
+            print(f"or set {BACKEND_ENV_VAR}=local to use a local model")
             return
             
-        self.gemini_api = GeminiAPI(api_key)
-        print(f"✅ API key loaded successfully: {api_key[:10]}...")
+        if isinstance(self.llm, GeminiAPI):
+            print(f"✅ API key loaded successfully: {self.llm.api_key[:10]}...")
+        else:
+            print(f"✅ Using the {self.llm.name} LLM backend")
         
     def setup_ui(self):
         """Setup the modern user interface"""
@@ -456,6 +489,8 @@ class RageBotApp(QMainWindow):
             }
         """)
         self.record_button.clicked.connect(self.toggle_recording)
+        # Hovering over Start reloads an idle-unloaded model before the click
+        self.record_button.installEventFilter(self)
         button_layout.addWidget(self.record_button)
         
         self.clear_button = QPushButton("🗑️ Clear History")
@@ -544,6 +579,36 @@ class RageBotApp(QMainWindow):
         tts_layout.addStretch()
         controls_layout.addLayout(tts_layout)
         
+        # Microphone selection
+        device_layout = QHBoxLayout()
+        
+        device_label = QLabel("🎙️ Microphone:")
+        device_label.setStyleSheet("font-size: 15px; color: #ffffff; font-weight: 600;")
+        device_layout.addWidget(device_label)
+        
+        self.device_combo = QComboBox()
+        self.device_combo.setStyleSheet("""
+            QComboBox {
+                background: #2c3e50;
+                color: #ffffff;
+                border: 2px solid #3498db;
+                border-radius: 8px;
+                padding: 6px 12px;
+                font-size: 14px;
+                min-width: 280px;
+            }
+            QComboBox QAbstractItemView {
+                background: #2c3e50;
+                color: #ffffff;
+                selection-background-color: #3498db;
+            }
+        """)
+        self.populate_input_devices()
+        device_layout.addWidget(self.device_combo)
+        
+        device_layout.addStretch()
+        controls_layout.addLayout(device_layout)
+        
         layout.addWidget(controls_card)
         
         # Progress bar
@@ -678,10 +743,22 @@ class RageBotApp(QMainWindow):
     def toggle_tts(self, state):
         """Toggle TTS on/off"""
         self.tts_enabled = state == Qt.Checked
+        if self.pipeline:
+            self.pipeline.tts = self.tts if self.tts_enabled else None
+        
+    def populate_input_devices(self):
+        """Fill the microphone list with the available input devices"""
+        self.device_combo.clear()
+        self.device_combo.addItem("System default", None)
+        try:
+            for device in list_input_devices():
+                self.device_combo.addItem(f"{device['name']} ({device['sample_rate']} Hz)", device["index"])
+        except Exception as e:
+            print(f"Error listing input devices: {e}")
         
     def change_speech_rate(self, value):
         """Change TTS speech rate"""
-        self.tts.engine.setProperty('rate', value)
+        self.tts.set_rate(value)
         self.speed_value_label.setText(f"{value} WPM")
         
     def speak_current_suggestion(self):
@@ -699,28 +776,47 @@ class RageBotApp(QMainWindow):
             
     def start_recording(self):
         """Start recording and transcription"""
-        if not self.gemini_api:
-            self.suggestion_display.setText("Error: Gemini API key not configured!\nPlease create a .env file with GEMINI_API_KEY=your_key")
+        if not self.llm:
+            self.suggestion_display.setText(f"Error: LLM backend not configured!\nPlease create a .env file with GEMINI_API_KEY=your_key or {BACKEND_ENV_VAR}=local")
             return
             
         try:
             # Initialize transcriber
-            self.transcriber = LiveTranscription(model_size="base", chunk_duration=2.0)
-            
-            # Start transcription thread
-            self.transcription_thread = TranscriptionThread(self.transcriber)
-            self.transcription_thread.transcription_received.connect(self.on_transcription_received)
-            self.transcription_thread.error_occurred.connect(self.on_error)
-            self.transcription_thread.start()
+            # ADAPTIVE_MODELS=tiny,base,small lets the transcriber trade accuracy for speed on slow machines
+            adaptive_models = [size.strip() for size in os.getenv('ADAPTIVE_MODELS', '').split(',') if size.strip()]
+            # One transcriber for the app's lifetime, so its model is loaded once
+            if self.transcriber is None:
+                # WHISPER_LANGUAGE=auto detects the language once; WHISPER_ENGLISH_ONLY=1 uses the faster .en models
+                # MODEL_IDLE_MINUTES releases the model after that long without recording (0 keeps it)
+                idle_minutes = float(os.getenv(IDLE_ENV_VAR, DEFAULT_IDLE_MINUTES))
+                self.transcriber = LiveTranscription(model_size="base", chunk_duration=CHUNK_DURATION,
+                                                     adaptive_models=adaptive_models or None,
+                                                     max_batch_size=4,
+                                                     language=os.getenv('WHISPER_LANGUAGE', 'en'),
+                                                     english_only=env_flag('WHISPER_ENGLISH_ONLY'),
+                                                     audio_frontend=env_flag('AUDIO_FRONTEND'),
+                                                     idle_timeout=idle_minutes * 60 if idle_minutes > 0 else None)
+            self.transcriber.input_device = self.device_combo.currentData()
+            self.tts.playback_listener = self.transcriber
             
-            # Start audio processing thread
-            self.audio_processing_thread = AudioProcessingThread(self.transcriber)
-            self.audio_processing_thread.transcription_ready.connect(self.on_transcription_received)
-            self.audio_processing_thread.start()
+            if self.async_mode:
+                self.start_pipeline()
+            else:
+                # Start transcription thread
+                self.transcription_thread = TranscriptionThread(self.transcriber)
+                self.transcription_thread.transcription_received.connect(self.on_transcription_received)
+                self.transcription_thread.error_occurred.connect(self.on_error)
+                self.transcription_thread.start()
+                
+                # Start audio processing thread
+                self.audio_processing_thread = AudioProcessingThread(self.transcriber)
+                self.audio_processing_thread.transcription_ready.connect(self.on_transcription_received)
+                self.audio_processing_thread.start()
             
             # Update UI
             self.is_recording = True
             self.is_ai_responding = False
+            self.device_combo.setEnabled(False)
             self.record_button.setText("⏹️ Stop Recording")
             self.record_button.setStyleSheet("""
                 QPushButton {
@@ -742,18 +838,20 @@ class RageBotApp(QMainWindow):
                 }
             """)
             
-            # Update recording UI
+            # Update recording UI (starts the waveform animation)
             self.update_recording_ui()
             
-            # Start animation
-            self.animation_timer.start(50)  # Update every 50ms for smoother animation
-            
         except Exception as e:
             self.suggestion_display.setText(f"Error starting recording: {str(e)}")
             
     def stop_recording(self):
         """Stop recording and transcription"""
         try:
+            # Stop the asyncio pipeline; it stops the transcriber as part of its shutdown
+            if self.pipeline:
+                self.pipeline.stop()
+                self.pipeline = None
+                
             # Stop threads
             if self.transcription_thread:
                 self.transcription_thread.stop()
@@ -763,12 +861,27 @@ class RageBotApp(QMainWindow):
                 self.audio_processing_thread.stop()
                 self.audio_processing_thread.wait()
                 
+            # Keep the words of an unfinished turn, without asking for a suggestion
+            self.turn_timer.stop()
+            if self.speculator:
+                self.speculator.cancel()
+                stats = self.speculator.get_stats()
+                print(f"🔮 Speculation: {stats['hits']} hits, {stats['misses']} misses, "
+                      f"{stats['wasted_calls']} wasted calls")
+            turn = self.turn_aggregator.flush()
+            if turn:
+                self.conversation_history.append(f"User: {turn}")
+                self.update_conversation_display()
+                
+            # Stops anything still running; the model stays loaded until the idle timeout
             if self.transcriber:
-                self.transcriber.stop_transcription()
+                self.tts.playback_listener = None
+                self.transcriber.stop()
                 
             # Update UI
             self.is_recording = False
             self.is_ai_responding = False
+            self.device_combo.setEnabled(True)
             self.record_button.setText("🎤 Start Recording")
             self.record_button.setStyleSheet("""
                 QPushButton {
@@ -803,42 +916,79 @@ class RageBotApp(QMainWindow):
                 }
             """)
             
-            # Update recording UI
+            # Update recording UI (stops the waveform animation)
             self.update_recording_ui()
             
-            # Stop animation
-            self.animation_timer.stop()
-            
-            # Reset waveform
-            self.reset_waveform()
-            
         except Exception as e:
             self.suggestion_display.setText(f"Error stopping recording: {str(e)}")
             
     def on_transcription_received(self, transcription):
         """Handle new transcription"""
-        if transcription.strip():
-            # Add to conversation history
-            self.conversation_history.append(f"User: {transcription}")
-            
-            # Update conversation display
-            self.update_conversation_display()
-            
-            # Generate AI suggestion
-            self.generate_ai_suggestion()
+        delay = self.turn_aggregator.add(transcription)
+        if delay is None:
+            return
             
+        # Show the turn in progress and wait for it to end
+        self.update_conversation_display()
+        self.turn_timer.start(math.ceil(delay * 1000))
+        
+        if self.speculator:
+            partial = self.turn_aggregator.pending_text
+            context = self.conversation_history[-4:] + [f"User: {partial}"]
+            self.speculator.on_partial("\n".join(context), partial)
+        
+    def on_turn_timer(self):
+        """End the current turn if no new transcription arrived in time"""
+        turn = self.turn_aggregator.flush_due()
+        if turn is None:
+            remaining = self.turn_aggregator.time_until_due()
+            if remaining is not None:
+                self.turn_timer.start(math.ceil(remaining * 1000))
+            return
+        self.on_turn_completed(turn)
+        
+    def on_turn_completed(self, turn):
+        """Handle a finished turn"""
+        # Add to conversation history
+        self.conversation_history.append(f"User: {turn}")
+        
+        # Update conversation display
+        self.update_conversation_display()
+        
+        # Generate AI suggestion, reusing a speculative request if it guessed the turn
+        prefetched = self.speculator.on_turn(turn) if self.speculator else None
+        self.generate_ai_suggestion(prefetched)
+        
+    def start_speculative_request(self, conversation_text):
+        """Start a suggestion request for a turn that is still in progress"""
+        return self.speculation_executor.submit(
+            profiling.profiled(self.llm.generate_response, "suggestion"), conversation_text
+        )
+        
+    def emit_prefetched_suggestion(self, future):
+        """Deliver the result of a committed speculative request (called on its thread)"""
+        if future.cancelled():
+            return
+        try:
+            self.suggestion_received.emit(future.result())
+        except Exception as e:
+            self.suggestion_failed.emit(str(e))
+        
     def update_conversation_display(self):
         """Update the conversation display"""
-        display_text = "\n".join(self.conversation_history)
+        lines = list(self.conversation_history)
+        if self.turn_aggregator.pending_text:
+            lines.append(f"User: {self.turn_aggregator.pending_text} …")
+        display_text = "\n".join(lines)
         self.conversation_display.setText(display_text)
         
         # Auto-scroll to bottom
         scrollbar = self.conversation_display.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
         
-    def generate_ai_suggestion(self):
-        """Generate AI suggestion using Gemini"""
-        if not self.gemini_api or not self.conversation_history:
+    def generate_ai_suggestion(self, prefetched=None):
+        """Generate AI suggestion using the LLM backend (or wait for a prefetched request)"""
+        if not self.llm or not self.conversation_history:
             return
             
         # Pause recording while AI is responding
@@ -850,42 +1000,95 @@ class RageBotApp(QMainWindow):
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
         self.suggestion_display.setText("🤔 Generating suggestion...")
         
+        if prefetched is not None:
+            prefetched.add_done_callback(self.emit_prefetched_suggestion)
+            return
+        
         # Run in separate thread to avoid blocking UI
         def generate_suggestion():
             try:
                 conversation_text = "\n".join(self.conversation_history[-5:])  # Last 5 exchanges
-                suggestion = self.gemini_api.generate_response(conversation_text)
+                suggestion = self.llm.generate_response(conversation_text)
                 
                 # Update UI from main thread using signal
                 self.suggestion_received.emit(suggestion)
                 
             except Exception as e:
-                self.suggestion_received.emit(f"Error generating suggestion: {str(e)}")
+                # Failures are shown but never become part of the conversation
+                self.suggestion_failed.emit(str(e))
         
         # Start suggestion thread
-        suggestion_thread = threading.Thread(target=generate_suggestion)
+        suggestion_thread = threading.Thread(target=profiling.profiled(generate_suggestion, "suggestion"))
         suggestion_thread.daemon = True
         suggestion_thread.start()
         
-    def on_suggestion_received(self, suggestion):
-        """Handle AI suggestion received"""
+    def start_pipeline(self):
+        """Run transcription, suggestions and TTS on the asyncio pipeline core"""
+        self.pipeline = AsyncPipeline(
+            self.transcriber,
+            self.create_async_llm(),
+            self.conversation_history,
+            tts=self.tts if self.tts_enabled else None,
+            on_transcription=lambda transcription: self.update_conversation_display(),
+            turn_aggregator=self.turn_aggregator,
+            on_turn=lambda turn: self.update_conversation_display(),
+            speculate=env_flag(SPECULATE_ENV_VAR),
+            on_suggestion=self.display_suggestion,
+            on_responding=self.set_ai_responding,
+            on_error=self.on_suggestion_failed,
+            on_capture_error=self.on_error,
+        )
+        pipeline = self.pipeline
+        task = asyncio.ensure_future(pipeline.run())
+        task.add_done_callback(lambda task: self.on_pipeline_finished(pipeline, task))
+        
+    def on_pipeline_finished(self, pipeline, task):
+        """Reset the recording UI if the pipeline ended without Stop being pressed"""
+        if self.pipeline is not pipeline:
+            return
+        error = None if task.cancelled() else task.exception()
+        if error:
+            self.on_error(str(error))
+        else:
+            self.stop_recording()
+        
+    def create_async_llm(self):
+        """Backend for the pipeline: Gemini gets the httpx client, others run on an executor"""
+        if isinstance(self.llm, GeminiAPI):
+            return AsyncGeminiAPI(self.llm.api_key, requests_per_minute=self.llm.requests_per_minute,
+                                  circuit_breaker=self.llm.circuit_breaker)
+        return self.llm
+        
+    def set_ai_responding(self, responding):
+        """Pipeline callback: the AI started or finished responding"""
+        self.is_ai_responding = responding
+        if responding:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 0)  # Indeterminate progress
+            self.suggestion_display.setText("🤔 Generating suggestion...")
+        self.update_recording_ui()
+        
+    def display_suggestion(self, suggestion):
+        """Show a suggestion that is already in the conversation history"""
         self.progress_bar.setVisible(False)
         self.suggestion_display.setText(suggestion)
+        self.update_conversation_display()
         
+    def on_suggestion_received(self, suggestion):
+        """Handle AI suggestion received"""
         # Add suggestion to conversation history
         self.conversation_history.append(f"AI: {suggestion}")
-        self.update_conversation_display()
+        self.display_suggestion(suggestion)
         
         # Speak the suggestion if TTS is enabled
-        if self.tts_enabled and suggestion and not suggestion.startswith("Error:"):
+        if self.tts_enabled and suggestion:
             # Speak in a separate thread to avoid blocking UI
             def speak_suggestion():
                 self.tts.speak(suggestion)
-                # Resume recording after speaking
-                self.is_ai_responding = False
-                self.update_recording_ui()
+                # Resume recording after speaking (UI updates belong on the main thread)
+                self.speech_finished.emit()
             
-            speak_thread = threading.Thread(target=speak_suggestion)
+            speak_thread = threading.Thread(target=profiling.profiled(speak_suggestion, "tts"))
             speak_thread.daemon = True
             speak_thread.start()
         else:
@@ -893,6 +1096,19 @@ class RageBotApp(QMainWindow):
             self.is_ai_responding = False
             self.update_recording_ui()
         
+    def on_speech_finished(self):
+        """The suggestion has been spoken; resume recording"""
+        self.is_ai_responding = False
+        self.update_recording_ui()
+        
+    def on_suggestion_failed(self, error_message):
+        """Show a failed suggestion request without adding it to the history"""
+        print(f"Error generating suggestion: {error_message}")
+        self.progress_bar.setVisible(False)
+        self.suggestion_display.setText(f"Error: {error_message}")
+        self.is_ai_responding = False
+        self.update_recording_ui()
+        
     def on_error(self, error_message):
         """Handle errors"""
         self.suggestion_display.setText(f"Error: {error_message}")
@@ -901,17 +1117,22 @@ class RageBotApp(QMainWindow):
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history.clear()
+        self.turn_aggregator.flush()
         self.conversation_display.clear()
         self.suggestion_display.clear()
         
     def update_animation(self):
-        """Update recording animation"""
+        """Update recording animation (the timer only runs while listening)"""
         self.waveform_frame = (self.waveform_frame + 1) % 20
+        self.animate_waveform()
         
-        # Animate waveform bars
+    def update_animation_state(self):
+        """Run the waveform timer only while listening; otherwise nothing ticks"""
         if self.is_recording and not self.is_ai_responding:
-            self.animate_waveform()
-        else:
+            if not self.animation_timer.isActive():
+                self.animation_timer.start(50)  # Update every 50ms for smoother animation
+        elif self.animation_timer.isActive():
+            self.animation_timer.stop()
             self.reset_waveform()
             
     def animate_waveform(self):
@@ -954,6 +1175,7 @@ class RageBotApp(QMainWindow):
         
     def update_recording_ui(self):
         """Update UI based on recording and AI response state"""
+        self.update_animation_state()
         if self.is_recording and not self.is_ai_responding:
             # Recording normally
             self.recording_indicator.setText("🎤 Recording...")
@@ -1000,13 +1222,24 @@ class RageBotApp(QMainWindow):
                 }
             """)
         
+    def eventFilter(self, watched, event):
+        """Preload the Whisper model when the pointer enters the Start button"""
+        if (watched is self.record_button and event.type() == QEvent.Enter
+                and self.transcriber and not self.is_recording):
+            self.transcriber.preload_model()
+        return super().eventFilter(watched, event)
+        
     def closeEvent(self, event):
         """Handle application close"""
         if self.is_recording:
             self.stop_recording()
+        if self.transcriber:
+            self.transcriber.close()
+        self.tts.close()
         event.accept()
 
 def main():
+    profiling.install()
     app = QApplication(sys.argv)
     
     # Set application style
@@ -1016,6 +1249,14 @@ def main():
     window = RageBotApp()
     window.show()
     
+    if window.async_mode:
+        # Drive asyncio from the Qt event loop
+        loop = qasync.QEventLoop(app)
+        asyncio.set_event_loop(loop)
+        with loop:
+            loop.run_forever()
+        sys.exit(0)
+    
     # Run the application
     sys.exit(app.exec())
 
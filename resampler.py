@@ -0,0 +1,87 @@
+"""
+Streaming polyphase resampler
+
+Converts microphone audio captured at the device's native rate (44.1 kHz,
+48 kHz, ...) to the 16 kHz Whisper expects. The rational ratio is reduced to
+up/down factors and a windowed-sinc low-pass filter is split into `up` phases,
+so each output sample costs one short dot product. Input arrives in small
+callback buffers; the filter history and output position carry over between
+calls, so the stream is resampled without gaps or clicks at buffer edges.
+"""
+from math import gcd
+
+import numpy as np
+
+
+class StreamingResampler:
+    def __init__(self, input_rate, output_rate=16000, zero_crossings=16, rolloff=0.94, beta=8.0):
+        """
+        Design the polyphase filter bank
+
+        Args:
+            input_rate (int): Sample rate of the audio passed to process()
+            output_rate (int): Sample rate of the audio returned
+            zero_crossings (int): Filter half-length in zero crossings of the sinc
+                (longer filters give a sharper cutoff at a higher CPU cost)
+            rolloff (float): Cutoff as a fraction of the lower Nyquist frequency
+            beta (float): Kaiser window shape parameter
+        """
+        divisor = gcd(int(input_rate), int(output_rate))
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        self.up = self.output_rate // divisor
+        self.down = self.input_rate // divisor
+
+        # Low-pass prototype at the upsampled rate, with gain `up` to make up for zero stuffing
+        cutoff = rolloff / max(self.up, self.down)
+        half_length = zero_crossings * max(self.up, self.down)
+        t = np.arange(-half_length, half_length + 1)
+        prototype = self.up * cutoff * np.sinc(cutoff * t) * np.kaiser(len(t), beta)
+
+        # phases[p, m] = prototype[p + m * up]: the taps applied to x[i], x[i - 1], ...
+        self.taps = -(-len(prototype) // self.up)
+        padded = np.zeros(self.taps * self.up)
+        padded[:len(prototype)] = prototype
+        self.phases = padded.reshape(self.taps, self.up).T.astype(np.float32)
+        # Filter delay in output samples (equal rates pass through unfiltered)
+        self.delay = half_length / self.down if self.up != self.down else 0.0
+
+        self.reset()
+
+    def reset(self):
+        """Forget the stream history, e.g. before a new recording"""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._samples_in = 0  # Input samples consumed so far
+        self._next_output = 0  # Index of the next output sample
+
+    def process(self, samples):
+        """
+        Resample the next block of a stream
+
+        Args:
+            samples (np.ndarray): float32 mono samples at input_rate
+
+        Returns:
+            np.ndarray: float32 samples at output_rate (length varies by a sample
+                between calls for non-integer ratios)
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.up == self.down:
+            return samples
+
+        history_start = self._samples_in - len(self._history)
+        extended = np.concatenate((self._history, samples))
+        self._samples_in += len(samples)
+
+        # Output n needs input up to index (n * down) // up, which must have arrived
+        last_output = (self._samples_in * self.up - 1) // self.down
+        outputs = np.arange(self._next_output, last_output + 1)
+        self._next_output = last_output + 1
+        self._history = extended[len(extended) - len(self._history):]
+        if not len(outputs):
+            return np.zeros(0, dtype=np.float32)
+
+        positions = outputs * self.down
+        newest = positions // self.up - history_start
+        windows = extended[newest[:, None] - np.arange(self.taps)]
+        return np.einsum("nm,nm->n", self.phases[positions % self.up], windows).astype(np.float32)
@@ -0,0 +1,264 @@
+"""
+Failure handling for LLM requests
+
+Typed errors, jittered exponential backoff that honours Retry-After, a circuit
+breaker that fails fast while the service is down, and a token-bucket rate
+limiter that keeps requests under the account's quota. call_with_retries and
+call_with_retries_async tie them together for blocking and asyncio clients.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+
+class LLMError(Exception):
+    """A suggestion request failed"""
+    retryable = False
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(LLMError):
+    """The service rejected the request because of its quota (HTTP 429)"""
+    retryable = True
+
+
+class ServiceUnavailableError(LLMError):
+    """Server error, timeout or connection failure"""
+    retryable = True
+
+
+class RequestRejectedError(LLMError):
+    """The service rejected the request itself (bad key, bad request, ...); retrying won't help"""
+
+
+class CircuitOpenError(LLMError):
+    """Requests are being failed fast after repeated service failures"""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def check_http_response(response, service):
+    """Raise the matching LLMError for an unsuccessful HTTP response (requests or httpx)"""
+    status = response.status_code
+    if status < 400:
+        return
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    message = f"{service} returned HTTP {status}"
+    if status == 429:
+        raise RateLimitedError(message, retry_after)
+    if status >= 500 or status == 408:
+        raise ServiceUnavailableError(message, retry_after)
+    raise RequestRejectedError(message)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=8.0, max_total_time=20.0):
+        """
+        Args:
+            max_attempts (int): Attempts per request, including the first one
+            base_delay (float): Backoff before the first retry, doubled for each retry
+            max_delay (float): Upper bound on a single backoff
+            max_total_time (float): Give up rather than wait past this many seconds
+                since the first attempt
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_total_time = max_total_time
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (1 for the first retry)"""
+        if retry_after is not None:
+            # The server said when; add a little jitter so clients don't retry in lockstep
+            return retry_after + random.uniform(0, self.base_delay)
+        # Full jitter
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds to fail fast before letting a trial request through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenError if the request should fail fast"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError("Service unavailable, not retrying for a while",
+                                   retry_after=max(0.0, remaining))
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Free the half-open trial slot when the trial ended without telling us anything
+        about the service (cancelled, quota, bad request); another request may try"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=15, burst=3):
+        """
+        Token bucket
+
+        Args:
+            requests_per_minute (float): Sustained request rate allowed
+            burst (int): Requests allowed back to back after an idle period
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def reserve(self):
+        """Take a token; returns how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            self.throttled += 1
+            return -self._tokens / self.rate
+
+
+def _retry_delay(error, attempt, started, policy):
+    """Backoff before the next attempt, or None if the error should be raised"""
+    if not error.retryable or attempt >= policy.max_attempts:
+        return None
+    delay = policy.backoff(attempt, error.retry_after)
+    if time.monotonic() + delay - started > policy.max_total_time:
+        return None
+    return delay
+
+
+def call_with_retries(request, policy, breaker=None, limiter=None):
+    """
+    Run a blocking request with rate limiting, retries and a circuit breaker
+
+    Args:
+        request (callable): Performs one attempt; raises LLMError subclasses on failure
+        policy (RetryPolicy): Backoff settings
+        breaker (CircuitBreaker): Shared breaker, or None
+        limiter (RateLimiter): Shared rate limiter, or None
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        if breaker:
+            breaker.before_request()
+        attempt += 1
+        try:
+            if limiter:
+                time.sleep(limiter.reserve())
+            result = request()
+        except LLMError as e:
+            _record_failure(e, breaker)
+            delay = _retry_delay(e, attempt, started, policy)
+            if delay is None:
+                raise
+            print(f"⚠️  {e} - retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            if breaker:
+                breaker.release_trial()
+            raise
+        if breaker:
+            breaker.record_success()
+        return result
+
+
+async def call_with_retries_async(request, policy, breaker=None, limiter=None):
+    """Like call_with_retries, for a coroutine function"""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        if breaker:
+            breaker.before_request()
+        attempt += 1
+        try:
+            if limiter:
+                await asyncio.sleep(limiter.reserve())
+            result = await request()
+        except LLMError as e:
+            _record_failure(e, breaker)
+            delay = _retry_delay(e, attempt, started, policy)
+            if delay is None:
+                raise
+            print(f"⚠️  {e} - retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled (superseded suggestion) or an unexpected error: not an outage
+            if breaker:
+                breaker.release_trial()
+            raise
+        if breaker:
+            breaker.record_success()
+        return result
+
+
+def _record_failure(error, breaker):
+    """Only outages count against the breaker; a quota or request problem is not an outage,
+    but it doesn't show the service has recovered either"""
+    if not breaker:
+        return
+    if isinstance(error, ServiceUnavailableError):
+        breaker.record_failure()
+    else:
+        breaker.release_trial()
@@ -89,7 +89,8 @@ def test_installation():
         
         # Test Whisper model loading
         print("🔄 Testing Whisper model loading...")
-        model = faster_whisper.WhisperModel("tiny")
+        from model_store import load_whisper_model
+        model = load_whisper_model("tiny")
         print("✅ Whisper model loaded successfully")
         
         print("\n🎉 Installation test passed! You can now run:")
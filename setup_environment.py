@@ -45,6 +45,20 @@ def setup_environment():
             f.write(f"# CHUNK_DURATION=2.0\n")
             f.write(f"# MODEL_SIZE=base\n")
             f.write(f"# SAMPLE_RATE=16000\n")
+            f.write(f"# ADAPTIVE_MODELS=tiny,base,small\n")
+            f.write(f"# WHISPER_LANGUAGE=auto\n")
+            f.write(f"# WHISPER_ENGLISH_ONLY=1\n")
+            f.write(f"# AUDIO_FRONTEND=1\n")
+            f.write(f"# RAGEBOT_MODEL_DIR=models\n")
+            f.write(f"# RAGEBOT_OFFLINE=1\n")
+            f.write(f"# MODEL_IDLE_MINUTES=10\n")
+            f.write(f"# RAGEBOT_TTS_CACHE_DIR=~/.cache/ragebot/tts\n")
+            f.write(f"# SPECULATIVE_SUGGESTIONS=1\n")
+            f.write(f"# GEMINI_RPM=15\n")
+            f.write(f"# LLM_BACKEND=gemini\n")
+            f.write(f"# LOCAL_LLM_URL=http://127.0.0.1:8080\n")
+            f.write(f"# TTS_BACKEND=piper\n")
+            f.write(f"# PIPER_MODEL=voices/en_US-ryan-medium.onnx\n")
         
         print(f"✅ .env file created successfully!")
         print(f"📁 Location: {env_file.absolute()}")
@@ -115,6 +129,20 @@ GEMINI_API_KEY=your_api_key_here
 # CHUNK_DURATION=2.0
 # MODEL_SIZE=base
 # SAMPLE_RATE=16000
+# ADAPTIVE_MODELS=tiny,base,small
+# WHISPER_LANGUAGE=auto
+# WHISPER_ENGLISH_ONLY=1
+# AUDIO_FRONTEND=1
+# RAGEBOT_MODEL_DIR=models
+# RAGEBOT_OFFLINE=1
+# MODEL_IDLE_MINUTES=10
+# RAGEBOT_TTS_CACHE_DIR=~/.cache/ragebot/tts
+# SPECULATIVE_SUGGESTIONS=1
+# GEMINI_RPM=15
+# LLM_BACKEND=gemini
+# LOCAL_LLM_URL=http://127.0.0.1:8080
+# TTS_BACKEND=piper
+# PIPER_MODEL=voices/en_US-ryan-medium.onnx
 """
     
     try:
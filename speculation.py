@@ -0,0 +1,121 @@
+"""
+Speculative suggestion prefetch
+
+While a turn is still in progress (see turn_taking.py) the words so far are
+usually the words of the final turn. SpeculativePrefetcher starts a suggestion
+request on the partial turn so the network round trip overlaps with the
+speaker finishing the sentence and the end-of-turn debounce. When the turn
+ends, the speculative request is committed if the partial text is close enough
+to the final turn (word-level edit distance), otherwise it is cancelled and the
+caller issues a fresh request.
+
+Requests are started through a callable returning a handle with cancel() -
+a concurrent.futures.Future in the threaded app, an asyncio.Task in the async
+pipeline - so the same logic serves both.
+"""
+from transcript_filter import normalize_text
+
+
+def word_edit_distance(a, b):
+    """Levenshtein distance between two texts, counted in words"""
+    a, b = normalize_text(a).split(), normalize_text(b).split()
+    previous = list(range(len(b) + 1))
+    for i, word_a in enumerate(a, 1):
+        current = [i]
+        for j, word_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word_a != word_b)))
+        previous = current
+    return previous[-1]
+
+
+def relative_edit_distance(a, b):
+    """Word edit distance normalised by the longer text (0 = same words, 1 = nothing shared)"""
+    longest = max(len(normalize_text(a).split()), len(normalize_text(b).split()))
+    return word_edit_distance(a, b) / longest if longest else 0.0
+
+
+class SpeculativePrefetcher:
+    def __init__(self, start_request, max_distance=0.2, min_words=3, max_per_turn=3):
+        """
+        Args:
+            start_request (callable): Called with the conversation context; returns a
+                handle (Future or Task) for the suggestion request
+            max_distance (float): Largest relative word edit distance between the partial
+                and the final turn for the speculative result to be used
+            min_words (int): Don't speculate on partial turns shorter than this
+            max_per_turn (int): Most speculative requests started for one turn
+        """
+        self.start_request = start_request
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.max_per_turn = max_per_turn
+
+        self._partial = None
+        self._handle = None
+        self._started_this_turn = 0
+
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def on_partial(self, context, partial):
+        """
+        Speculate on the turn so far, replacing an older speculation
+
+        Args:
+            context (str): Conversation context to send, ending with the partial turn
+            partial (str): Text of the turn so far
+        """
+        if len(normalize_text(partial).split()) < self.min_words:
+            return
+        if self._started_this_turn >= self.max_per_turn or partial == self._partial:
+            return
+        self._discard()
+        self._partial = partial
+        self._handle = self.start_request(context)
+        self._started_this_turn += 1
+        self.started += 1
+
+    def on_turn(self, turn):
+        """
+        Resolve the speculation for a finished turn
+
+        Returns:
+            The request handle to use for this turn, or None if the caller should
+            issue a new request
+        """
+        self._started_this_turn = 0
+        if self._handle is None:
+            return None
+        if relative_edit_distance(self._partial, turn) <= self.max_distance:
+            handle = self._handle
+            self._partial = self._handle = None
+            self.hits += 1
+            return handle
+        self.misses += 1
+        self._discard()
+        return None
+
+    def cancel(self):
+        """Drop any speculation in flight, e.g. when recording stops"""
+        self._started_this_turn = 0
+        self._discard()
+
+    def _discard(self):
+        """Cancel the current speculative request; its call is wasted either way"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self.wasted += 1
+        self._partial = self._handle = None
+
+    def get_stats(self):
+        """Speculation counters for monitoring"""
+        resolved = self.hits + self.misses
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "wasted_calls": self.wasted,
+            "hit_rate": self.hits / resolved if resolved else None,
+        }
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 RageBot Launcher - Simple startup script with dependency checking
+
+Pass --profile to run RageBot with per-thread cProfile collectors and
+tracemalloc snapshots enabled (see profiling.py).
 """
 
 import sys
@@ -9,6 +12,7 @@ import subprocess
 import importlib
 from pathlib import Path
 from dotenv import load_dotenv
+from profiling import PROFILE_ENV_VAR
 
 def check_dependencies():
     """Check if all required dependencies are installed"""
@@ -102,9 +106,14 @@ def main():
             return
     
     # Start the application
+    env = os.environ.copy()
+    if "--profile" in sys.argv[1:]:
+        env[PROFILE_ENV_VAR] = "1"
+        print("📊 Profiling enabled for this run")
+    
     print("\n🚀 Starting RageBot...")
     try:
-        subprocess.run([sys.executable, "ragebot_pyside.py"])
+        subprocess.run([sys.executable, "ragebot_pyside.py"], env=env)
     except KeyboardInterrupt:
         print("\n👋 RageBot stopped by user")
     except Exception as e:
@@ -0,0 +1,125 @@
+"""
+Incremental log-mel features for overlapping analysis windows
+
+With chunk_overlap, consecutive windows handed to Whisper share most of their
+audio, and faster-whisper recomputes the STFT and mel projection of the whole
+window every time. A log-mel frame depends only on the 400 samples around its
+centre, so the frames inside the shared part are the same in both windows.
+StreamingFeatureExtractor caches them by their position in the stream and
+only computes the new frames, plus the two frames at each edge of the window
+that faster-whisper pads (zero and reflect padding) and that therefore differ
+per window. The per-window normalisation (clamp to max - 8 dB, rescale) is
+applied to the assembled frames, so the result matches FeatureExtractor.
+
+It wraps a model's feature_extractor and is called by WhisperModel.transcribe
+like the original; the caller announces each window with set_window().
+"""
+import numpy as np
+
+
+class StreamingFeatureExtractor:
+    def __init__(self, extractor):
+        """
+        Args:
+            extractor (FeatureExtractor): The model's faster-whisper feature extractor
+        """
+        self.extractor = extractor
+        self.n_fft = extractor.n_fft
+        self.hop_length = extractor.hop_length
+        self.window = np.hanning(self.n_fft + 1)[:-1].astype(np.float32)
+
+        self._audio = None  # Audio of the announced window
+        self._features = None  # Its log-mel features, computed on first use
+        self._start = 0  # Stream sample of the window's first sample
+
+        # log10 mel power of interior frames, columns numbered in stream frames from _cache_first
+        self._cache = None
+        self._cache_first = 0
+        self._cache_alignment = None
+
+        self.frames_computed = 0
+        self.frames_reused = 0
+
+    def __getattr__(self, name):
+        # sampling_rate, nb_max_frames, time_per_frame, ... come from the wrapped extractor
+        return getattr(self.extractor, name)
+
+    def set_window(self, audio, start_sample):
+        """
+        Announce the next window WhisperModel.transcribe will be called with
+
+        Args:
+            audio (np.ndarray): float32 window, the same object passed to transcribe
+            start_sample (int): Position of its first sample in the audio stream
+        """
+        self._audio = audio
+        self._features = None
+        self._start = start_sample
+
+    def reset(self):
+        """Forget cached frames, e.g. when a new recording session starts"""
+        self._audio = self._features = self._cache = None
+        self._cache_alignment = None
+
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        if waveform is not self._audio or padding != self.hop_length or chunk_length is not None:
+            return self.extractor(waveform, padding=padding, chunk_length=chunk_length)
+        if len(waveform) < 4 * self.n_fft:
+            # Too short for the edge frames and the interior to separate
+            return self.extractor(waveform, padding=padding)
+        if self._features is None:
+            self._features = self._compute(waveform)
+        return self._features
+
+    def _compute(self, audio):
+        """Log-mel features of the announced window, reusing cached interior frames"""
+        hop, half = self.hop_length, self.n_fft // 2
+        n_frames = len(audio) // hop + 1
+        # Frame i covers audio[i * hop - half : i * hop + half]; interior frames need no padding
+        first = -(-half // hop)
+        last = (len(audio) - half) // hop + 1
+        base = self._start // hop  # Stream frame of the window's frame 0
+
+        if self._cache_alignment != self._start % hop:
+            # Frames of differently aligned windows never coincide
+            self._cache = None
+            self._cache_alignment = self._start % hop
+
+        log_mel = np.empty((self.extractor.mel_filters.shape[0], n_frames), dtype=np.float32)
+
+        # Edges: padded like FeatureExtractor (hop zeros at the end, then reflection)
+        head = np.pad(audio[:first * hop + half + 1], (half, 0), mode="reflect")
+        log_mel[:, :first] = self._log_mel(head, first)
+        tail = np.pad(np.pad(audio[last * hop - half:], (0, hop)), (0, half), mode="reflect")
+        log_mel[:, last:] = self._log_mel(tail, n_frames - last)
+
+        # Interior: reuse the overlap with the previous window, compute the rest
+        reused_from = reused_to = first
+        if self._cache is not None:
+            reused_from = max(first, self._cache_first - base)
+            reused_to = min(last, self._cache_first + self._cache.shape[1] - base)
+            if reused_to > reused_from:
+                offset = base - self._cache_first
+                log_mel[:, reused_from:reused_to] = self._cache[:, reused_from + offset:reused_to + offset]
+            else:
+                reused_from = reused_to = first
+        for start, end in ((first, reused_from), (reused_to, last)):
+            if end > start:
+                log_mel[:, start:end] = self._log_mel(audio[start * hop - half:(end - 1) * hop + half], end - start)
+
+        reused = reused_to - reused_from
+        self.frames_reused += reused
+        self.frames_computed += n_frames - reused
+        self._cache = log_mel[:, first:last].copy()
+        self._cache_first = base + first
+
+        # Per-window normalisation, as in FeatureExtractor
+        log_mel = np.maximum(log_mel, log_mel.max() - 8.0)
+        return (log_mel + 4.0) / 4.0
+
+    def _log_mel(self, signal, count):
+        """log10 mel power of `count` frames starting every hop_length samples of `signal`"""
+        frames = np.lib.stride_tricks.sliding_window_view(signal, self.n_fft)[::self.hop_length][:count]
+        spectrum = np.fft.rfft(frames * self.window, axis=-1).astype(np.complex64)
+        mel = self.extractor.mel_filters @ (np.abs(spectrum) ** 2).T
+        return np.log10(np.clip(mel, 1e-10, None))
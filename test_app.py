@@ -73,8 +73,15 @@ def test_transcription():
     
     try:
         from live_transcription import LiveTranscription
+        from model_store import is_model_available
         print("✅ LiveTranscription class imported successfully")
         
+        # Loading a model that isn't on disk would download it; don't do that from a test
+        if not is_model_available("tiny"):
+            print("⚠️  Whisper model tiny is not downloaded, skipping model load")
+            print("   Run: python model_store.py download-models tiny")
+            return True
+        
         # Test initialization (without starting audio)
         transcriber = LiveTranscription(model_size="tiny")
         print("✅ Transcriber initialized successfully")
@@ -85,6 +92,165 @@ def test_transcription():
         print(f"❌ Transcription test failed: {e}")
         return False
 
+def test_chunk_overlap():
+    """Test that words in the overlap of two chunks are emitted once"""
+    print("\n🔁 Testing overlapping chunks...")
+    
+    try:
+        from collections import namedtuple
+        from live_transcription import LiveTranscription
+        
+        Word = namedtuple("Word", ["start", "end", "word"])
+        Segment = namedtuple("Segment", ["start", "end", "text", "words"])
+        
+        class OfflineTranscription(LiveTranscription):
+            def _load_models(self):
+                pass
+        
+        def emitted(segments):
+            """Text emitted for (segment, chunk_start) pairs of 3s chunks overlapping by 1s"""
+            transcriber = OfflineTranscription(chunk_duration=3.0, chunk_overlap=1.0, transcript_filter=False)
+            texts = []
+            transcriber.on_transcription = texts.append
+            for segment, chunk_start in segments:
+                transcriber._emit_segment(segment, chunk_start)
+            return " ".join(texts)
+        
+        # The second chunk decodes "dogs" again from the overlap (2-3s of the session)
+        first = Segment(0.0, 2.8, " I like cats and dogs", [
+            Word(0.0, 0.3, " I"), Word(0.3, 0.8, " like"), Word(0.8, 1.5, " cats"),
+            Word(1.5, 2.1, " and"), Word(2.1, 2.8, " dogs"),
+        ])
+        second = Segment(0.1, 1.9, " dogs a lot", [
+            Word(0.1, 0.8, " dogs"), Word(0.8, 1.2, " a"), Word(1.2, 1.9, " lot"),
+        ])
+        text = emitted([(first, 0.0), (second, 2.0)])
+        if text != "I like cats and dogs a lot":
+            print(f"❌ Overlap emitted twice with word timings: {text!r}")
+            return False
+        
+        # Batched and worker-process segments carry no word timings
+        text = emitted([(first._replace(words=None), 0.0), (second._replace(text=" Dogs, a lot.", words=None), 2.0)])
+        if text != "I like cats and dogs a lot.":
+            print(f"❌ Overlap emitted twice without word timings: {text!r}")
+            return False
+        
+        print("✅ Overlapping chunks emit each word once")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Chunk overlap test failed: {e}")
+        return False
+
+def test_dropped_audio():
+    """Test that audio dropped under overload doesn't corrupt overlapping chunks"""
+    print("\n🕳️ Testing dropped audio with overlapping chunks...")
+    
+    try:
+        import threading
+        import time
+        import numpy as np
+        from faster_whisper.feature_extractor import FeatureExtractor
+        from live_transcription import LiveTranscription
+        from streaming_features import StreamingFeatureExtractor
+        
+        class FakeModel:
+            """Records each chunk's feature error and whether it matches the captured audio"""
+            def __init__(self):
+                self.feature_extractor = StreamingFeatureExtractor(FeatureExtractor())
+                self.release = threading.Event()
+                self.busy = threading.Event()
+                self.errors = []
+                self.misplaced = 0
+            
+            def transcribe(self, audio, **options):
+                self.busy.set()
+                self.release.wait()
+                expected = FeatureExtractor()(audio)
+                self.errors.append(float(np.abs(self.feature_extractor(audio) - expected).max()))
+                start = self.feature_extractor._start
+                if not np.allclose(audio, source[start:start + len(audio)], atol=1e-4):
+                    self.misplaced += 1
+                return [], None
+        
+        class OfflineTranscription(LiveTranscription):
+            def _load_models(self):
+                self.model = FakeModel()
+        
+        sample_rate, buffer_size = 16000, 1600
+        source = (np.random.default_rng(0).uniform(-0.5, 0.5, 40 * buffer_size) * 32767).astype(np.int16) / 32768.0
+        transcriber = OfflineTranscription(chunk_duration=1.0, chunk_overlap=0.5, transcript_filter=False,
+                                           frames_per_buffer=buffer_size, max_lag=0.5)
+        model = transcriber.model
+        transcriber._stopped.clear()
+        worker = threading.Thread(target=transcriber.process_audio_chunks)
+        worker.start()
+        
+        def capture(index):
+            pcm = (source[index * buffer_size:(index + 1) * buffer_size] * 32768).astype(np.int16)
+            transcriber.audio_callback(pcm.tobytes(), buffer_size, None, 0)
+        
+        try:
+            # Fill the first chunk, then overflow the queue while the worker is decoding it
+            for index in range(10):
+                capture(index)
+                time.sleep(0.002)
+            model.busy.wait(timeout=5)
+            for index in range(10, 17):
+                capture(index)
+            model.release.set()
+            for index in range(17, 40):
+                capture(index)
+                time.sleep(0.002)
+        finally:
+            model.release.set()
+            transcriber.audio_queue.put(None)
+            worker.join(timeout=5)
+            transcriber._stopped.set()
+        
+        if not transcriber.dropped_buffers or len(model.errors) < 3:
+            print(f"❌ Scenario didn't drop audio: {transcriber.get_stats()['dropped_buffers']} dropped, "
+                  f"{len(model.errors)} chunks")
+            return False
+        if max(model.errors) > 1e-4 or model.misplaced:
+            print(f"❌ Chunks after the drop got wrong features {model.errors} or positions ({model.misplaced})")
+            return False
+        
+        print(f"✅ {len(model.errors)} chunks match a fresh feature extractor after a drop")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Dropped audio test failed: {e}")
+        return False
+
+def test_transcript_filter():
+    """Test that short real replies survive the hallucination filter"""
+    print("\n🧹 Testing transcript filter...")
+    
+    try:
+        from collections import namedtuple
+        from transcript_filter import TranscriptFilter
+        
+        Segment = namedtuple("Segment", ["text", "no_speech_prob", "avg_logprob", "compression_ratio"])
+        transcript_filter = TranscriptFilter()
+        
+        if not transcript_filter.keep(Segment(" Okay.", 0.3, -0.2, 0.8)):
+            print("❌ A confidently decoded 'Okay.' was dropped")
+            return False
+        if transcript_filter.keep(Segment(" Okay.", 0.7, -0.4, 0.8)):
+            print("❌ 'Okay.' on likely silence was kept")
+            return False
+        if transcript_filter.keep(Segment(" Thanks for watching!", 0.3, -0.2, 0.8)):
+            print("❌ 'Thanks for watching!' was kept")
+            return False
+        
+        print("✅ Transcript filter keeps real replies")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Transcript filter test failed: {e}")
+        return False
+
 def test_gui():
     """Test PySide6 GUI components"""
     print("\n🖥️ Testing GUI components...")
@@ -113,7 +279,19 @@ def test_gemini_api():
     print("\n🤖 Testing Gemini API...")
     
     try:
-        from ragebot_pyside import GeminiAPI
+        from gemini_api import GeminiAPI
+        from resilience import LLMError
+        
+        # Blocked, safety-filtered and empty replies must fail as LLMErrors, not KeyErrors
+        for body in ({"promptFeedback": {"blockReason": "SAFETY"}},
+                     {"candidates": [{"finishReason": "SAFETY"}]},
+                     {"candidates": []}):
+            try:
+                GeminiAPI("test-key").parse_response(body)
+                print(f"❌ Malformed response was returned as a suggestion: {body}")
+                return False
+            except LLMError:
+                pass
         
         # Load .env file
         load_dotenv()
@@ -127,19 +305,289 @@ def test_gemini_api():
         
         # Test with a simple prompt
         test_prompt = "Say hello"
-        response = api.generate_response(test_prompt)
-        
-        if response and not response.startswith("Error"):
-            print(f"✅ API test successful: {response[:50]}...")
-            return True
-        else:
-            print(f"❌ API test failed: {response}")
+        try:
+            response = api.generate_response(test_prompt)
+        except LLMError as e:
+            print(f"❌ API test failed ({type(e).__name__}): {e}")
             return False
+        
+        print(f"✅ API test successful: {response[:50]}...")
+        return True
             
     except Exception as e:
         print(f"❌ Gemini API test failed: {e}")
         return False
 
+def test_idle_wakeups():
+    """Test that the app does no periodic work while idle"""
+    print("\n💤 Testing idle wakeups...")
+    
+    try:
+        import time
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtCore import QObject, QEvent, QEventLoop, QTimer
+        from ragebot_pyside import RageBotApp
+        
+        class WakeupCounter(QObject):
+            """Counts timer events delivered anywhere in the app, except to `ignore`"""
+            def __init__(self, ignore):
+                super().__init__()
+                self.ignore = ignore
+                self.wakeups = 0
+                
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Timer and watched is not self.ignore:
+                    self.wakeups += 1
+                return False
+        
+        def wakeups_per_second(seconds=1.0):
+            """Run the event loop and return (timer wakeups/s, CPU seconds/s)"""
+            loop = QEventLoop()
+            stop_timer = QTimer()
+            stop_timer.setSingleShot(True)
+            stop_timer.timeout.connect(loop.quit)
+            counter = WakeupCounter(stop_timer)
+            app.installEventFilter(counter)
+            cpu_start = time.process_time()
+            stop_timer.start(int(seconds * 1000))
+            loop.exec()
+            app.removeEventFilter(counter)
+            return counter.wakeups / seconds, (time.process_time() - cpu_start) / seconds
+        
+        app = QApplication.instance() or QApplication([])
+        window = RageBotApp()
+        window.show()
+        
+        # Let startup work (layout, first paint) settle
+        wakeups_per_second(0.5)
+        
+        wakeups, cpu = wakeups_per_second()
+        print(f"   Idle: {wakeups:.0f} wakeups/s, {cpu * 100:.1f}% CPU")
+        if wakeups > 0 or cpu > 0.02:
+            print("❌ The idle app is still doing periodic work")
+            return False
+        
+        # Recording but paused while the AI responds: no animation or restyling either
+        window.is_recording = True
+        window.is_ai_responding = True
+        window.update_recording_ui()
+        wakeups, cpu = wakeups_per_second()
+        print(f"   Paused: {wakeups:.0f} wakeups/s, {cpu * 100:.1f}% CPU")
+        window.is_recording = False
+        window.is_ai_responding = False
+        window.update_recording_ui()
+        if wakeups > 0:
+            print("❌ The waveform timer keeps running while the AI is responding")
+            return False
+        
+        window.close()
+        print("✅ No wakeups while idle")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Idle wakeup test failed: {e}")
+        return False
+
+def test_llm_backends():
+    """Test the offline echo backend"""
+    print("\n🔌 Testing LLM backends...")
+    
+    try:
+        from llm_backends import EchoBackend, create_backend
+        
+        backend = create_backend("echo")
+        if not isinstance(backend, EchoBackend):
+            print("❌ create_backend('echo') returned the wrong backend")
+            return False
+        
+        history = "User: cats are better than dogs\nAI: Sure.\nUser: pineapple belongs on pizza"
+        response = backend.generate_response(history)
+        if response != backend.generate_response(history) or "pineapple belongs on pizza" not in response:
+            print(f"❌ Echo backend is not deterministic: {response}")
+            return False
+        
+        print(f"✅ Echo backend: {response}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ LLM backend test failed: {e}")
+        return False
+
+def test_tts_cache():
+    """Test the synthesized speech cache"""
+    print("\n🗣️ Testing TTS cache...")
+    
+    try:
+        import tempfile
+        from tts_cache import SpeechAudio, TTSCache, cache_key
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            audio = SpeechAudio(bytes(range(256)) * 40, 22050, 1, 2)
+            key = cache_key("Obviously  you're wrong.", "voice", 165, 0.85)
+            if key != cache_key(" Obviously you're wrong. ", "voice", 165, 0.85):
+                print("❌ Cache key depends on whitespace")
+                return False
+            if key == cache_key("Obviously you're wrong.", "voice", 200, 0.85):
+                print("❌ Cache key ignores the speech rate")
+                return False
+            
+            TTSCache(cache_dir=cache_dir).put(key, audio)
+            # A new cache only has the disk tier
+            cache = TTSCache(cache_dir=cache_dir)
+            if cache.get(key) != audio or cache.get(key) != audio:
+                print("❌ Cached audio does not round-trip")
+                return False
+            if (cache.disk_hits, cache.memory_hits) != (1, 1):
+                print(f"❌ Unexpected cache hits: {cache.get_stats()}")
+                return False
+            
+            small = TTSCache(max_memory_bytes=len(audio.pcm), cache_dir=cache_dir, max_disk_bytes=0)
+            small.put("other", audio)
+            if small.get(key) is not None or os.listdir(cache_dir):
+                print("❌ Cache exceeds its size limits")
+                return False
+        
+        print("✅ TTS cache working")
+        return True
+        
+    except Exception as e:
+        print(f"❌ TTS cache test failed: {e}")
+        return False
+
+def test_audio_frontend():
+    """Test the audio clean-up stages"""
+    print("\n🎚️ Testing audio front-end...")
+    
+    try:
+        import numpy as np
+        from audio_frontend import AudioFrontEnd
+        
+        sample_rate = 16000
+        t = np.arange(3 * sample_rate) / sample_rate
+        # Quiet 200 Hz tone switching on and off, riding on a DC offset
+        audio = (0.2 + 0.01 * np.sin(2 * np.pi * 200 * t) * ((t % 1) < 0.5)).astype(np.float32)
+        frontend = AudioFrontEnd(sample_rate)
+        cleaned = np.concatenate([frontend.process(buffer.copy()) for buffer in np.split(audio, 150)])
+        
+        last_second = cleaned[-sample_rate:]
+        if abs(last_second.mean()) > 0.01:
+            print(f"❌ DC offset not removed: {last_second.mean():.3f}")
+            return False
+        if frontend.get_stats()["gain_db"] < 6:
+            print(f"❌ Quiet speech not boosted: {frontend.get_stats()}")
+            return False
+        
+        print(f"✅ Audio front-end working ({frontend.get_stats()['gain_db']:.1f} dB gain)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Audio front-end test failed: {e}")
+        return False
+
+def test_circuit_breaker():
+    """Test that a cancelled half-open trial doesn't keep the circuit open"""
+    print("\n⚡ Testing circuit breaker...")
+    
+    try:
+        import asyncio
+        from resilience import (CircuitBreaker, CircuitOpenError, RateLimitedError, RetryPolicy,
+                                ServiceUnavailableError, call_with_retries_async)
+        
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        policy = RetryPolicy(max_attempts=1)
+        
+        async def outage():
+            raise ServiceUnavailableError("down")
+        
+        async def hang():
+            await asyncio.sleep(10)
+        
+        async def healthy():
+            return "ok"
+        
+        async def rate_limited():
+            raise RateLimitedError("quota")
+        
+        async def scenario():
+            try:
+                await call_with_retries_async(outage, policy, breaker)
+            except ServiceUnavailableError:
+                pass
+            if breaker.state != "open":
+                return f"breaker is {breaker.state} after an outage"
+            try:
+                await call_with_retries_async(healthy, policy, breaker)
+                return "open breaker let a request through"
+            except CircuitOpenError:
+                pass
+            
+            # Half-open trial superseded by a newer suggestion
+            await asyncio.sleep(0.06)
+            trial = asyncio.ensure_future(call_with_retries_async(hang, policy, breaker))
+            await asyncio.sleep(0.01)
+            trial.cancel()
+            try:
+                await trial
+            except asyncio.CancelledError:
+                pass
+            
+            if await call_with_retries_async(healthy, policy, breaker) != "ok":
+                return "request after the cancelled trial failed"
+            if breaker.state != "closed":
+                return f"breaker is {breaker.state} after a successful trial"
+            
+            # A quota error on the trial says nothing about recovery
+            try:
+                await call_with_retries_async(outage, policy, breaker)
+            except ServiceUnavailableError:
+                pass
+            await asyncio.sleep(0.06)
+            try:
+                await call_with_retries_async(rate_limited, policy, breaker)
+            except RateLimitedError:
+                pass
+            if breaker.state == "closed":
+                return "a rate-limited trial closed the breaker"
+            return None
+        
+        error = asyncio.run(scenario())
+        if error:
+            print(f"❌ {error}")
+            return False
+        
+        print("✅ Circuit breaker recovers after a cancelled trial")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Circuit breaker test failed: {e}")
+        return False
+
+def test_turn_taking():
+    """Test that punctuated fragments of one sentence make one turn"""
+    print("\n💬 Testing turn taking...")
+    
+    try:
+        from turn_taking import TurnAggregator
+        
+        aggregator = TurnAggregator(chunk_duration=2.0)
+        # Whisper ends both 2s chunks of one sentence with a period
+        aggregator.add("I think cats are.", now=0.0)
+        if aggregator.flush_due(now=2.0) is not None:
+            print("❌ Turn ended before the next fragment arrived")
+            return False
+        aggregator.add("Better than dogs.", now=2.0)
+        turn = aggregator.flush_due(now=2.0 + aggregator.time_until_due(now=2.0))
+        if turn != "I think cats are. Better than dogs.":
+            print(f"❌ Fragments were not merged into one turn: {turn!r}")
+            return False
+        
+        print(f"✅ Turn taking working: {turn}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Turn taking test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 RageBot Component Tests")
@@ -149,7 +597,16 @@ def main():
         test_imports,
         test_api_key,
         test_transcription,
+        test_chunk_overlap,
+        test_dropped_audio,
+        test_transcript_filter,
         test_gui,
+        test_idle_wakeups,
+        test_turn_taking,
+        test_llm_backends,
+        test_circuit_breaker,
+        test_tts_cache,
+        test_audio_frontend,
         test_gemini_api
     ]
     
@@ -2,7 +2,7 @@
 Simple test script to verify faster-whisper installation and basic functionality
 """
 import numpy as np
-from faster_whisper import WhisperModel
+from model_store import is_model_available, load_whisper_model
 import time
 
 def test_whisper_installation():
@@ -11,8 +11,11 @@ def test_whisper_installation():
     
     try:
         # Load the model
+        if not is_model_available("tiny"):
+            print("⚠️  Whisper model tiny is not downloaded; run: python model_store.py download-models tiny")
+            return
         print("Loading Whisper model (tiny for speed)...")
-        model = WhisperModel("tiny")
+        model = load_whisper_model("tiny")
         print("✅ Model loaded successfully!")
         
         # Create a simple test audio (silence)
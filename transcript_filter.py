@@ -0,0 +1,127 @@
+"""
+Hallucination and duplicate filtering for Whisper output
+
+On near-silent or noisy chunks Whisper tends to produce filler ("Thank you.",
+"Thanks for watching!"), repetition loops, or the same sentence again for
+overlapping audio. Every transcript that gets through triggers a suggestion
+request and a TTS run, so low-value segments are dropped here using the
+scores Whisper reports for each segment and a rolling window of recently
+emitted text.
+"""
+import re
+import time
+from collections import deque
+
+# Phrases Whisper is known to produce on silence or background noise
+KNOWN_HALLUCINATIONS = frozenset([
+    "thanks for watching",
+    "thank you for watching",
+    "please subscribe",
+    "subscribe to my channel",
+])
+
+# Filler Whisper also produces on silence, but that is an ordinary short reply in a
+# conversation; only dropped when Whisper is much less sure anyone spoke
+COMMON_REPLIES = frozenset([
+    "thank you",
+    "thank you very much",
+    "bye",
+    "you",
+    "so",
+    "okay",
+])
+
+REJECTION_REASONS = ("no_speech", "low_logprob", "repetition", "hallucination", "duplicate")
+
+
+def normalize_text(text):
+    """Lowercase and strip punctuation so near-identical transcripts compare equal"""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+class TranscriptFilter:
+    def __init__(self, no_speech_threshold=0.6, logprob_threshold=-1.0, min_avg_logprob=-1.5,
+                 compression_ratio_threshold=2.4, hallucination_no_speech_threshold=0.2,
+                 reply_no_speech_threshold=0.5, reply_logprob_threshold=-0.7,
+                 dedupe_window=5, dedupe_seconds=10.0):
+        """
+        Args:
+            no_speech_threshold (float): Drop segments whose no-speech probability is above
+                this while their avg_logprob is below logprob_threshold
+            logprob_threshold (float): See no_speech_threshold
+            min_avg_logprob (float): Drop segments decoded with lower confidence than this
+            compression_ratio_threshold (float): Drop segments that compress better than
+                this (repetition loops)
+            hallucination_no_speech_threshold (float): Drop known filler phrases when the
+                no-speech probability is above this
+            reply_no_speech_threshold (float): Drop common short replies ("okay", "bye", ...)
+                when the no-speech probability is above this
+            reply_logprob_threshold (float): Also drop them above
+                hallucination_no_speech_threshold if avg_logprob is below this
+            dedupe_window (int): Number of recently emitted transcripts to compare against
+            dedupe_seconds (float): How long an emitted transcript stays in the window
+        """
+        self.no_speech_threshold = no_speech_threshold
+        self.logprob_threshold = logprob_threshold
+        self.min_avg_logprob = min_avg_logprob
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.hallucination_no_speech_threshold = hallucination_no_speech_threshold
+        self.reply_no_speech_threshold = reply_no_speech_threshold
+        self.reply_logprob_threshold = reply_logprob_threshold
+        self.dedupe_seconds = dedupe_seconds
+
+        self._recent = deque(maxlen=dedupe_window)  # (monotonic time, normalized text)
+        self.rejected = dict.fromkeys(REJECTION_REASONS, 0)
+
+    def rejection_reason(self, segment):
+        """
+        Check one Whisper segment (anything with text, no_speech_prob, avg_logprob and
+        compression_ratio attributes)
+
+        Returns:
+            str: Reason the segment should be dropped, or None to keep it
+        """
+        if segment.no_speech_prob > self.no_speech_threshold and segment.avg_logprob < self.logprob_threshold:
+            return "no_speech"
+        if segment.avg_logprob < self.min_avg_logprob:
+            return "low_logprob"
+        if segment.compression_ratio > self.compression_ratio_threshold:
+            return "repetition"
+        text = normalize_text(segment.text)
+        if text in KNOWN_HALLUCINATIONS and segment.no_speech_prob > self.hallucination_no_speech_threshold:
+            return "hallucination"
+        if text in COMMON_REPLIES and (
+                segment.no_speech_prob > self.reply_no_speech_threshold
+                or (segment.no_speech_prob > self.hallucination_no_speech_threshold
+                    and segment.avg_logprob < self.reply_logprob_threshold)):
+            return "hallucination"
+        return None
+
+    def keep(self, segment):
+        """True if the segment is worth emitting; rejections are counted"""
+        reason = self.rejection_reason(segment)
+        if reason:
+            self.rejected[reason] += 1
+            return False
+        return True
+
+    def accept(self, text, now=None):
+        """
+        Check a finished transcript against the recently emitted ones
+
+        Returns:
+            bool: False if the same text was emitted within the dedupe window
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return False
+        now = time.monotonic() if now is None else now
+        if any(seen == normalized and now - seen_at <= self.dedupe_seconds for seen_at, seen in self._recent):
+            self.rejected["duplicate"] += 1
+            return False
+        self._recent.append((now, normalized))
+        return True
+
+    def reset(self):
+        """Forget recently emitted transcripts"""
+        self._recent.clear()
@@ -0,0 +1,172 @@
+"""
+Process-pool transcription backend
+
+Each worker process loads its own Whisper model, so several audio chunks can be
+decoded in parallel without contending on the GIL. Audio is handed to workers
+through multiprocessing.shared_memory instead of being pickled, keeping the
+capture side lightweight, and results are returned in submission order.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batched_inference import BatchedSegment
+
+# Per-process state, set up by _init_worker
+_worker_model = None
+_worker_options = None
+
+
+def _init_worker(model_size, cpu_threads, transcribe_options):
+    """Load the Whisper model once per worker process"""
+    global _worker_model, _worker_options
+    from model_store import load_whisper_model
+
+    _worker_model = load_whisper_model(model_size, cpu_threads=cpu_threads)
+    _worker_options = transcribe_options
+
+
+def _transcribe_shared(shm_name, num_samples):
+    """Transcribe float32 audio stored in a shared memory block into BatchedSegments"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        audio = np.ndarray((num_samples,), dtype=np.float32, buffer=shm.buf)
+        decode_start = time.perf_counter()
+        segments, _ = _worker_model.transcribe(audio, **_worker_options)
+        # Plain tuples pickle cheaply; the parent filters on the scores
+        results = [
+            BatchedSegment(segment.start, segment.end, segment.text, segment.tokens,
+                           segment.avg_logprob, segment.no_speech_prob, segment.compression_ratio)
+            for segment in segments
+        ]
+        decode_seconds = time.perf_counter() - decode_start
+        # Drop the view before closing, otherwise the buffer is still exported
+        del audio, segments
+        return results, decode_seconds
+    finally:
+        shm.close()
+
+
+class ProcessPoolTranscriber:
+    def __init__(self, model_size="base", workers=2, transcribe_options=None, max_pending=None,
+                 sample_rate=16000):
+        """
+        Start the worker processes
+
+        Args:
+            model_size (str): Whisper model size loaded in every worker
+            workers (int): Number of worker processes
+            transcribe_options (dict): Keyword arguments passed to WhisperModel.transcribe
+            max_pending (int): Maximum chunks in flight before submit() blocks (default: 2 per worker)
+            sample_rate (int): Sample rate of submitted audio
+        """
+        self.workers = workers
+        self.sample_rate = sample_rate
+        # Split the cores between workers instead of letting each one grab them all
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model_size, cpu_threads, transcribe_options or {}),
+        )
+
+        self._pending = deque()  # (audio_seconds, SharedMemory, Future, tag) in submission order
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 2)
+        self._closed = False
+
+    def submit(self, audio_array, timeout=None, tag=None):
+        """
+        Queue a float32 audio chunk for transcription
+
+        Blocks while max_pending chunks are in flight so backpressure reaches the
+        capture queue. Returns False if no slot became free within `timeout`.
+        `tag` (e.g. the chunk's position in the stream) is returned with its result.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return False
+
+        audio_array = np.ascontiguousarray(audio_array, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, audio_array.nbytes))
+        try:
+            np.ndarray(audio_array.shape, dtype=np.float32, buffer=shm.buf)[:] = audio_array
+            future = self.executor.submit(_transcribe_shared, shm.name, len(audio_array))
+        except Exception:
+            self._release(shm)
+            raise
+
+        with self._not_empty:
+            self._pending.append((len(audio_array) / self.sample_rate, shm, future, tag))
+            self._not_empty.notify()
+        return True
+
+    def next_result(self, timeout=None):
+        """
+        Wait for the oldest submitted chunk to finish
+
+        Results always come back in submission order, even if a later chunk
+        finished first on another worker.
+
+        Returns:
+            tuple: (segments, audio_seconds, decode_seconds, tag), or None on timeout, wake()
+                or after close()
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            if not self._pending and not self._closed:
+                self._not_empty.wait(timeout)
+            if not self._pending:
+                return None
+            audio_seconds, shm, future, tag = self._pending[0]
+
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            segments, decode_seconds = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            return None
+        finally:
+            if future.done():
+                # close() may already have taken ownership of the block
+                with self._lock:
+                    owned = bool(self._pending) and self._pending[0][2] is future
+                    if owned:
+                        self._pending.popleft()
+                if owned:
+                    self._release(shm)
+        return segments, audio_seconds, decode_seconds, tag
+
+    def wake(self):
+        """Make threads waiting in next_result() for a submission return None"""
+        with self._not_empty:
+            self._not_empty.notify_all()
+    
+    def _release(self, shm):
+        """Free a shared memory block and its in-flight slot"""
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._slots.release()
+
+    def close(self):
+        """Stop the workers and free any shared memory still in flight"""
+        with self._not_empty:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending)
+            self._pending.clear()
+            self._not_empty.notify_all()
+
+        for _, _, future, _ in pending:
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        for _, shm, _, _ in pending:
+            self._release(shm)
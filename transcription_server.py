@@ -0,0 +1,312 @@
+"""
+Multi-stream transcription server
+
+Accepts many concurrent audio streams over TCP and transcribes them with one
+shared Whisper model. Like LiveTranscription, sessions only cut audio into
+chunks and put them on a queue; a single inference thread drains that queue in
+batches (one batched encoder/decoder call for chunks from several sessions)
+and sends each transcript back to the session it came from.
+
+Protocol (one TCP connection per audio stream):
+    client -> server: frames of 16 kHz mono 16-bit little-endian PCM, each
+                      prefixed with a 4-byte big-endian length. A zero-length
+                      frame ends the stream.
+    server -> client: newline-delimited JSON, one object per transcript:
+                      {"session": 3, "seq": 0, "start": 0.0, "end": 2.0, "text": "..."}
+                      and {"session": 3, "event": "end"} once the stream is done.
+
+Usage:
+    python transcription_server.py --model base --port 8765
+"""
+import argparse
+import json
+import queue
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+import profiling
+from batched_inference import gather_batch, transcribe_batch
+from model_store import load_whisper_model
+from transcript_filter import TranscriptFilter
+
+FRAME_HEADER = struct.Struct(">I")
+
+
+def send_frame(sock, payload):
+    """Send one length-prefixed audio frame (an empty payload ends the stream)"""
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def read_frame(rfile):
+    """Read one length-prefixed frame; returns None when the peer disconnects"""
+    header = rfile.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    payload = rfile.read(length)
+    if len(payload) < length:
+        return None
+    return payload
+
+
+class StreamSession:
+    def __init__(self, session_id, wfile, chunk_size, sample_rate=16000):
+        """
+        State for one connected audio stream
+
+        Args:
+            session_id (int): Identifier echoed back with every transcript
+            wfile: Writable file for the client connection
+            chunk_size (int): Samples per chunk handed to the model
+            sample_rate (int): Audio sample rate
+        """
+        self.session_id = session_id
+        self.wfile = wfile
+        self.chunk_size = chunk_size
+        self.sample_rate = sample_rate
+
+        self.audio_buffer = bytearray()
+        self.samples_consumed = 0
+        self.next_seq = 0
+        self.pending = 0
+        self.connected = True
+        self.transcript_filter = TranscriptFilter()
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+
+    def add_audio(self, audio_data, flush=False):
+        """
+        Append PCM bytes and cut off complete chunks
+
+        Returns:
+            list: (seq, start_seconds, float32 audio) for every complete chunk,
+                  plus the leftover partial chunk when `flush` is True
+        """
+        self.audio_buffer += audio_data
+        chunk_bytes = self.chunk_size * 2
+        chunks = []
+        while len(self.audio_buffer) >= chunk_bytes or (flush and self.audio_buffer):
+            raw = bytes(self.audio_buffer[:chunk_bytes])
+            del self.audio_buffer[:chunk_bytes]
+            audio_array = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+            chunks.append((self.next_seq, self.samples_consumed / self.sample_rate, audio_array))
+            self.samples_consumed += len(audio_array)
+            self.next_seq += 1
+
+        with self._lock:
+            self.pending += len(chunks)
+        return chunks
+
+    def send(self, message):
+        """Write one JSON line to the client (ignored once it has gone away)"""
+        line = (json.dumps(message) + "\n").encode("utf-8")
+        with self._lock:
+            if not self.connected:
+                return
+            try:
+                self.wfile.write(line)
+                self.wfile.flush()
+            except OSError:
+                self.connected = False
+
+    def chunk_done(self):
+        """Mark one submitted chunk as transcribed"""
+        with self._drained:
+            self.pending -= 1
+            if self.pending <= 0:
+                self._drained.notify_all()
+
+    def wait_drained(self, timeout=None):
+        """Wait until every submitted chunk has been transcribed"""
+        with self._drained:
+            return self._drained.wait_for(lambda: self.pending <= 0, timeout)
+
+
+class TranscriptionServer:
+    def __init__(self, model_size="base", host="127.0.0.1", port=8765, chunk_duration=2.0,
+                 max_batch_size=8, max_wait=0.05, sample_rate=16000):
+        """
+        Load the shared model and prepare the listening socket
+
+        Args:
+            model_size (str): Whisper model size shared by all sessions
+            host (str): Interface to listen on
+            port (int): TCP port to listen on
+            chunk_duration (float): Seconds of audio per transcribed chunk
+            max_batch_size (int): Maximum chunks decoded in one batched call
+            max_wait (float): Seconds to wait for more chunks once one is ready
+            sample_rate (int): Audio sample rate clients must send
+        """
+        self.chunk_size = int(sample_rate * chunk_duration)
+        self.sample_rate = sample_rate
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.transcribe_options = {"language": "en", "beam_size": 5, "temperature": 0.0}
+
+        print(f"Loading Whisper model: {model_size}")
+        self.model = load_whisper_model(model_size)
+        print("Model loaded successfully!")
+
+        # (session, seq, start_seconds, float32 audio) from every connected stream
+        self.segment_queue = queue.Queue()
+        self.is_running = False
+        self._next_session_id = 0
+        self._session_lock = threading.Lock()
+
+        # Throughput counters
+        self.batches = 0
+        self.chunks_transcribed = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.filtered_segments = 0
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server.handle_session(self.rfile, self.wfile)
+
+        self.tcp_server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.tcp_server.daemon_threads = True
+
+    def handle_session(self, rfile, wfile):
+        """Read one client's audio stream until it ends or disconnects"""
+        with self._session_lock:
+            session_id = self._next_session_id
+            self._next_session_id += 1
+        session = StreamSession(session_id, wfile, self.chunk_size, self.sample_rate)
+        print(f"🔌 Session {session_id} connected")
+
+        audio_data = None
+        while self.is_running:
+            audio_data = read_frame(rfile)
+            end_of_stream = not audio_data
+            for seq, start, audio_array in session.add_audio(audio_data or b"", flush=end_of_stream):
+                self.segment_queue.put((session, seq, start, audio_array))
+            if end_of_stream:
+                break
+
+        if audio_data is not None:
+            # Clean end of stream: deliver the remaining transcripts first
+            session.wait_drained()
+            session.send({"session": session_id, "event": "end"})
+        session.connected = False
+        print(f"🔌 Session {session_id} closed")
+
+    def inference_loop(self):
+        """Decode queued chunks from all sessions in batches"""
+        while self.is_running:
+            batch = gather_batch(self.segment_queue, self.max_batch_size, self.max_wait)
+            if not batch:
+                continue
+
+            try:
+                decode_start = time.perf_counter()
+                segments = transcribe_batch(
+                    self.model, [item[3] for item in batch],
+                    sample_rate=self.sample_rate, **self.transcribe_options
+                )
+                decode_seconds = time.perf_counter() - decode_start
+            except Exception as e:
+                print(f"Error in batched transcription: {e}")
+                segments = [None] * len(batch)
+                decode_seconds = 0.0
+
+            self.batches += 1
+            self.decode_seconds += decode_seconds
+            for (session, seq, start, audio_array), segment in zip(batch, segments):
+                self.chunks_transcribed += 1
+                self.audio_seconds += len(audio_array) / self.sample_rate
+                if self._should_send(session, segment):
+                    session.send({
+                        "session": session.session_id,
+                        "seq": seq,
+                        "start": start,
+                        "end": start + segment.end,
+                        "text": segment.text.strip(),
+                    })
+                session.chunk_done()
+
+    def _should_send(self, session, segment):
+        """Drop empty, hallucinated and repeated segments"""
+        if segment is None or not segment.text.strip():
+            return False
+        transcript_filter = session.transcript_filter
+        reason = transcript_filter.rejection_reason(segment)
+        if reason:
+            transcript_filter.rejected[reason] += 1
+            self.filtered_segments += 1
+            return False
+        if not transcript_filter.accept(segment.text):
+            self.filtered_segments += 1
+            return False
+        return True
+    
+    def get_stats(self):
+        """Throughput counters for monitoring"""
+        return {
+            "batches": self.batches,
+            "chunks_transcribed": self.chunks_transcribed,
+            "mean_batch_size": self.chunks_transcribed / self.batches if self.batches else 0.0,
+            "audio_seconds": self.audio_seconds,
+            "decode_seconds": self.decode_seconds,
+            "queued_chunks": self.segment_queue.qsize(),
+            "filtered_segments": self.filtered_segments,
+        }
+
+    def serve_forever(self):
+        """Run the inference thread and accept connections until interrupted"""
+        self.is_running = True
+        inference_thread = threading.Thread(target=profiling.profiled(self.inference_loop, "server-inference"))
+        inference_thread.daemon = True
+        inference_thread.start()
+
+        host, port = self.tcp_server.server_address[:2]
+        print(f"🎧 Transcription server listening on {host}:{port}")
+        try:
+            self.tcp_server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop accepting connections and stop the inference thread"""
+        self.is_running = False
+        self.tcp_server.server_close()
+
+
+def main():
+    """Run the transcription server from the command line"""
+    parser = argparse.ArgumentParser(description="Multi-stream Whisper transcription server")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chunk-duration", type=float, default=2.0)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.05,
+                        help="Seconds to wait for more chunks before decoding a partial batch")
+    args = parser.parse_args()
+
+    profiling.install()
+    server = TranscriptionServer(
+        model_size=args.model,
+        host=args.host,
+        port=args.port,
+        chunk_duration=args.chunk_duration,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped")
+        stats = server.get_stats()
+        print(f"📊 {stats['chunks_transcribed']} chunks in {stats['batches']} batches, "
+              f"{stats['audio_seconds']:.1f}s audio decoded in {stats['decode_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
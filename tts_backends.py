@@ -0,0 +1,324 @@
+"""
+Pluggable text-to-speech backends
+
+TextToSpeech (ragebot_pyside.py) caches and plays speech; a backend turns text
+into 16-bit PCM. The backend is picked from configuration:
+
+    TTS_BACKEND=pyttsx3  The system voice through pyttsx3 (the default). Each
+                         utterance is rendered to a WAV file before playback.
+    TTS_BACKEND=piper    An offline neural Piper voice (PIPER_MODEL=voice.onnx,
+                         needs `pip install piper-tts`). piper_worker.py runs as a
+                         persistent subprocess, so the voice is loaded once, and
+                         streams PCM sentence by sentence, so playback starts
+                         while the rest is still being synthesized.
+
+Backends that can stream implement StreamingTTSBackend; backends that can
+speak through their own audio output when rendering fails implement
+DirectSpeechBackend.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import struct
+import subprocess
+import sys
+import tempfile
+import wave
+from collections import namedtuple
+from pathlib import Path
+
+from piper_worker import ERROR_FRAME
+from tts_cache import SpeechAudio, read_wav
+
+TTS_BACKEND_ENV_VAR = "TTS_BACKEND"
+
+# Words per minute of the default speech rate (the rate slider's initial value)
+DEFAULT_RATE = 165
+
+# Streamed speech: `chunks` yields PCM as it is synthesized
+SpeechStream = namedtuple("SpeechStream", ["chunks", "sample_rate", "channels", "sample_width"])
+
+
+class TTSError(RuntimeError):
+    """Speech could not be synthesized"""
+
+
+class TTSBackend(ABC):
+    """Interface implemented by every speech backend"""
+    name = None
+
+    @abstractmethod
+    def cache_settings(self):
+        """(voice, rate, volume) the cache key is built from"""
+
+    @abstractmethod
+    def set_rate(self, rate):
+        """Set the speech rate in words per minute"""
+
+    @abstractmethod
+    def synthesize(self, text):
+        """
+        Render the whole utterance
+
+        Returns:
+            SpeechAudio: The speech, or None if the engine can't render audio
+
+        Raises:
+            TTSError: Synthesis failed
+        """
+
+    def close(self):
+        """Release the engine"""
+
+
+class StreamingTTSBackend(TTSBackend):
+    """A backend that can play speech while the rest of the utterance is synthesized"""
+
+    @abstractmethod
+    def stream(self, text):
+        """
+        Start synthesizing the utterance
+
+        Returns:
+            SpeechStream: Iterating its chunks raises TTSError if synthesis fails
+        """
+
+    def synthesize(self, text):
+        stream = self.stream(text)
+        return SpeechAudio(b"".join(stream.chunks), stream.sample_rate, stream.channels, stream.sample_width)
+
+
+class DirectSpeechBackend(TTSBackend):
+    """A backend that can speak through its own audio output when synthesize() returns None"""
+
+    @abstractmethod
+    def speak(self, text):
+        """Speak the utterance, blocking until it has been spoken"""
+
+
+class Pyttsx3Backend(DirectSpeechBackend):
+    name = "pyttsx3"
+
+    def __init__(self):
+        import pyttsx3
+
+        self.engine = pyttsx3.init()
+        self._can_render = True  # False if the engine can't render to a WAV file
+        self.setup_voice()
+
+    def setup_voice(self):
+        """Setup TTS voice properties for more human-like speech"""
+        voices = self.engine.getProperty('voices')
+        if voices:
+            # Try to find the most natural-sounding voice
+            best_voice = None
+
+            # Priority order for voice selection
+            voice_priorities = [
+                'david', 'mark', 'james', 'john', 'mike',  # Common male names
+                'microsoft david', 'microsoft mark', 'microsoft james',
+                'sapi5 david', 'sapi5 mark', 'sapi5 james',
+                'nsspeechsynthesizer', 'espeak', 'festival'
+            ]
+
+            # First try to find a voice by name
+            for priority_name in voice_priorities:
+                for voice in voices:
+                    if priority_name.lower() in voice.name.lower():
+                        best_voice = voice
+                        break
+                if best_voice:
+                    break
+
+            # If no priority voice found, look for male voices
+            if not best_voice:
+                for voice in voices:
+                    if any(keyword in voice.name.lower() for keyword in ['male', 'david', 'mark', 'james', 'john']):
+                        best_voice = voice
+                        break
+
+            # Fallback to first available voice
+            if not best_voice and voices:
+                best_voice = voices[0]
+
+            if best_voice:
+                self.engine.setProperty('voice', best_voice.id)
+                print(f"Selected voice: {best_voice.name}")
+
+        # Set speech properties for more human-like sound
+        self.engine.setProperty('rate', DEFAULT_RATE)  # Slightly slower for more natural pace
+        self.engine.setProperty('volume', 0.85)  # Slightly lower volume for realism
+
+        # Try to set additional properties if available
+        try:
+            # Set pitch to be more natural (if supported)
+            self.engine.setProperty('pitch', 1.0)  # Normal pitch
+        except:
+            pass
+
+    def cache_settings(self):
+        return (self.engine.getProperty('voice'), self.engine.getProperty('rate'),
+                self.engine.getProperty('volume'))
+
+    def set_rate(self, rate):
+        self.engine.setProperty('rate', rate)
+
+    def synthesize(self, text):
+        """Render speech to a temporary WAV file and load it"""
+        if not self._can_render:
+            return None
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            audio = read_wav(path)
+            if not audio.pcm:
+                raise EOFError("no audio rendered")
+            return audio
+        except (OSError, EOFError, wave.Error) as e:
+            # e.g. macOS writes AIFF; fall back to speaking directly from now on
+            print(f"TTS cache disabled, engine can't render WAV audio: {e!r}")
+            self._can_render = False
+            return None
+        finally:
+            os.remove(path)
+
+    def speak(self, text):
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+
+class PiperBackend(StreamingTTSBackend):
+    name = "piper"
+
+    def __init__(self, model, speaker=None, rate=DEFAULT_RATE):
+        """
+        Args:
+            model (str): Path of the Piper voice (.onnx, with its .onnx.json next to it)
+            speaker (int): Speaker id of multi-speaker voices
+            rate (int): Speech rate in words per minute; DEFAULT_RATE is the voice's
+                natural pace
+
+        Raises:
+            ValueError: The voice file does not exist
+            TTSError: The worker could not load the voice (e.g. piper-tts is not installed)
+        """
+        if not Path(model).is_file():
+            raise ValueError(f"Piper voice {model} does not exist")
+        self.model = str(model)
+        self.speaker = speaker
+        self.rate = rate
+        self.sample_rate = None
+        self._process = None
+        self._unfinished = False  # An utterance's frames have not all been read
+        self.start()
+        # The worker sends the sample rate once the voice has loaded, so a missing
+        # package or a broken voice fails here rather than on the first utterance
+        try:
+            self._read_sample_rate()
+        except TTSError:
+            self.close()
+            raise
+
+    def start(self):
+        """Start the worker if it isn't running"""
+        if self._process is not None and self._process.poll() is None:
+            return
+        command = [sys.executable, str(Path(__file__).parent / "piper_worker.py"), "--model", self.model]
+        if self.speaker is not None:
+            command += ["--speaker", str(self.speaker)]
+        # stderr is inherited so worker errors show up in the console
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self.sample_rate = None
+        self._unfinished = False
+
+    def cache_settings(self):
+        return (f"piper:{self.model}:{self.speaker}", self.rate, 1.0)
+
+    def set_rate(self, rate):
+        self.rate = rate
+
+    def stream(self, text):
+        self.start()
+        if self.sample_rate is None:
+            self._read_sample_rate()
+        if self._unfinished:
+            # The previous utterance was abandoned; skip the rest of its audio
+            try:
+                for _ in self._frames():
+                    pass
+            except TTSError:
+                if self._unfinished:
+                    raise  # The worker exited
+        request = {"text": text, "length_scale": DEFAULT_RATE / self.rate}
+        try:
+            self._process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+            self._process.stdin.flush()
+        except OSError as e:
+            raise TTSError(f"Piper worker is not running: {e}") from e
+        self._unfinished = True
+        return SpeechStream(self._frames(), self.sample_rate, 1, 2)
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._process = None
+
+    def _read_sample_rate(self):
+        self.sample_rate = struct.unpack("<I", self._read(4))[0]
+
+    def _frames(self):
+        """Yield the PCM frames of the current utterance"""
+        while True:
+            size = struct.unpack("<I", self._read(4))[0]
+            if size == 0:
+                self._unfinished = False
+                return
+            if size == ERROR_FRAME:
+                self._unfinished = False
+                raise TTSError("Piper could not synthesize the utterance")
+            yield self._read(size)
+
+    def _read(self, size):
+        data = b""
+        while len(data) < size:
+            block = self._process.stdout.read(size - len(data))
+            if not block:
+                try:
+                    code = self._process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    code = None
+                raise TTSError(f"Piper worker exited (code {code})")
+            data += block
+        return data
+
+
+BACKENDS = ("pyttsx3", "piper")
+
+
+def create_tts_backend(name=None):
+    """
+    Build the backend selected by TTS_BACKEND (or `name`) from environment settings
+
+    Piper reads PIPER_MODEL and PIPER_SPEAKER.
+
+    Raises:
+        ValueError: Unknown backend, or the Piper voice is missing
+        TTSError: The Piper worker could not load the voice
+    """
+    name = (name or os.getenv(TTS_BACKEND_ENV_VAR) or "pyttsx3").strip().lower()
+    if name == "pyttsx3":
+        return Pyttsx3Backend()
+    if name == "piper":
+        model = os.getenv("PIPER_MODEL")
+        if not model:
+            raise ValueError("PIPER_MODEL is not set")
+        speaker = os.getenv("PIPER_SPEAKER")
+        return PiperBackend(model, speaker=int(speaker) if speaker else None)
+    raise ValueError(f"Unknown {TTS_BACKEND_ENV_VAR} {name!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,167 @@
+"""
+Cache of synthesized speech
+
+Speaking a suggestion means running the TTS engine on it, even when the same
+text is replayed with "Speak Response" or a phrase comes back. TTSCache keeps
+synthesized PCM keyed on the normalized text and the voice settings: recent
+clips in an in-memory LRU, and a size-bounded directory of WAV files behind it
+so clips survive restarts. Disk entries are evicted least recently used first,
+using file modification times that are refreshed on every hit.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import wave
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+CACHE_DIR_ENV_VAR = "RAGEBOT_TTS_CACHE_DIR"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "ragebot" / "tts"
+
+# 16-bit PCM; channels are interleaved
+SpeechAudio = namedtuple("SpeechAudio", ["pcm", "sample_rate", "channels", "sample_width"])
+
+
+def normalize_tts_text(text):
+    """Collapse whitespace so trivially different strings share a cache entry"""
+    return " ".join(text.split())
+
+
+def cache_key(text, voice, rate, volume):
+    """Cache key for a text spoken with the given voice id, rate and volume"""
+    material = "\x1f".join([normalize_tts_text(text), str(voice), str(rate), f"{float(volume):.3f}"])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def read_wav(path):
+    """Load a WAV file as SpeechAudio"""
+    with wave.open(str(path), "rb") as wav:
+        return SpeechAudio(wav.readframes(wav.getnframes()), wav.getframerate(),
+                           wav.getnchannels(), wav.getsampwidth())
+
+
+def write_wav(path, audio):
+    """Write SpeechAudio to a WAV file atomically"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f, wave.open(f, "wb") as wav:
+            wav.setnchannels(audio.channels)
+            wav.setsampwidth(audio.sample_width)
+            wav.setframerate(audio.sample_rate)
+            wav.writeframes(audio.pcm)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TTSCache:
+    def __init__(self, max_memory_bytes=32 * 1024 * 1024, cache_dir=None,
+                 max_disk_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            max_memory_bytes (int): Size of the in-memory LRU, in bytes of PCM
+            cache_dir (str): Directory of the disk tier (default: RAGEBOT_TTS_CACHE_DIR
+                or ~/.cache/ragebot/tts); False disables the disk tier
+            max_disk_bytes (int): Size the disk tier is trimmed to
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        if cache_dir is False:
+            self.cache_dir = None
+        else:
+            self.cache_dir = Path(cache_dir or os.getenv(CACHE_DIR_ENV_VAR) or DEFAULT_CACHE_DIR).expanduser()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._memory = OrderedDict()  # key -> SpeechAudio, least recently used first
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached audio for a key, or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        path = self._path(key)
+        if path is not None:
+            try:
+                audio = read_wav(path)
+                os.utime(path)  # Most recently used
+            except (OSError, EOFError, wave.Error):
+                audio = None
+            if audio is not None:
+                self._remember(key, audio)
+                self.disk_hits += 1
+                return audio
+        self.misses += 1
+        return None
+
+    def put(self, key, audio):
+        """Store synthesized audio in both tiers"""
+        self._remember(key, audio)
+        path = self._path(key)
+        if path is not None:
+            try:
+                write_wav(path, audio)
+                self._trim_disk()
+            except OSError as e:
+                print(f"TTS cache: could not write {path}: {e}")
+
+    def get_stats(self):
+        """Hit counters for monitoring"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+            "memory_bytes": self._memory_bytes,
+        }
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.wav" if self.cache_dir else None
+
+    def _remember(self, key, audio):
+        """Add to the memory tier, evicting least recently used clips over the limit"""
+        size = len(audio.pcm)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous.pcm)
+            self._memory[key] = audio
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.pcm)
+
+    def _trim_disk(self):
+        """Delete the least recently used files until the disk tier fits max_disk_bytes"""
+        entries = []
+        for path in self.cache_dir.glob("*.wav"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,112 @@
+"""
+Turn aggregation for RageBot
+
+The transcriber emits a fragment every couple of seconds while someone talks,
+so one sentence can arrive as three transcripts. TurnAggregator merges
+consecutive fragments and decides when the speaker has finished: after a
+debounce interval with no new fragment, sooner when the last fragment ends a
+sentence, and in any case once a turn grows too long.
+
+It does no timing of its own: add() returns how long to wait before checking
+again, and the caller arms whatever timer its event loop provides (a QTimer in
+the GUI, loop.call_later in the asyncio pipeline) and calls flush_due().
+"""
+import time
+
+# Punctuation that ends a sentence in Whisper output
+END_OF_TURN_PUNCTUATION = (".", "?", "!")
+
+# Seconds added to the transcriber's chunk interval, so the next fragment of the same
+# sentence arrives before the wait runs out even when its decode takes a little longer.
+# Whisper ends almost every chunk with ".", so the punctuation wait must also exceed it.
+DEBOUNCE_MARGIN = 1.0
+PUNCTUATION_MARGIN = 0.5
+
+
+class TurnAggregator:
+    def __init__(self, chunk_duration=2.0, debounce=None, punctuation_debounce=None,
+                 max_turn_duration=20.0):
+        """
+        Args:
+            chunk_duration (float): Seconds between the transcriber's fragments while
+                someone talks (its chunk_duration); the default waits are derived from it
+            debounce (float): Seconds without a new fragment that end a turn (default:
+                chunk_duration + DEBOUNCE_MARGIN); keep it above the chunk interval so
+                a pause between chunks does not split a sentence
+            punctuation_debounce (float): Shorter wait used when the last fragment ends
+                with sentence punctuation (default: chunk_duration + PUNCTUATION_MARGIN,
+                False to ignore punctuation); also keep it above the chunk interval
+            max_turn_duration (float): Seconds after the first fragment at which a turn
+                is ended even if fragments keep coming
+        """
+        if debounce is None:
+            debounce = chunk_duration + DEBOUNCE_MARGIN
+        if punctuation_debounce is None:
+            punctuation_debounce = chunk_duration + PUNCTUATION_MARGIN
+        self.chunk_duration = chunk_duration
+        self.debounce = debounce
+        self.punctuation_debounce = punctuation_debounce
+        self.max_turn_duration = max_turn_duration
+
+        self._fragments = []
+        self._started_at = None
+        self._deadline = None
+
+        self.fragments_received = 0
+        self.turns_completed = 0
+
+    @property
+    def pending_text(self):
+        """Fragments of the turn in progress, merged"""
+        return " ".join(self._fragments)
+
+    def add(self, text, now=None):
+        """
+        Add a transcript fragment to the current turn
+
+        Returns:
+            float: Seconds until flush_due() should be called, or None for empty text
+        """
+        text = text.strip()
+        if not text:
+            return None
+        now = time.monotonic() if now is None else now
+        if not self._fragments:
+            self._started_at = now
+        self._fragments.append(text)
+        self.fragments_received += 1
+
+        wait = self.debounce
+        if self.punctuation_debounce is not False and text.endswith(END_OF_TURN_PUNCTUATION):
+            wait = self.punctuation_debounce
+        self._deadline = min(now + wait, self._started_at + self.max_turn_duration)
+        return max(0.0, self._deadline - now)
+
+    def time_until_due(self, now=None):
+        """Seconds until the current turn is due (None if there is no turn in progress)"""
+        if not self._fragments:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._deadline - now)
+
+    def flush_due(self, now=None):
+        """
+        End the current turn if its deadline has passed
+
+        Returns:
+            str: The merged turn, or None if no turn is due yet
+        """
+        if self.time_until_due(now) != 0.0:
+            return None
+        return self.flush()
+
+    def flush(self):
+        """End the current turn now; returns the merged text or None if empty"""
+        if not self._fragments:
+            return None
+        text = self.pending_text
+        self._fragments = []
+        self._started_at = None
+        self._deadline = None
+        self.turns_completed += 1
+        return text